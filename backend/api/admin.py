@@ -0,0 +1,21 @@
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+
+from .profiling import list_profiles, profile_path
+
+
+def profiles_view(request):
+    context = {
+        **admin.site.each_context(request),
+        "title": "Профили запросов",
+        "profiles": list_profiles(),
+    }
+    return TemplateResponse(request, "admin/api/profiles.html", context)
+
+
+def profile_download_view(request, name):
+    path = profile_path(name)
+    if path is None:
+        raise Http404("Профиль не найден.")
+    return FileResponse(open(path, "rb"), as_attachment=True)
@@ -1,6 +1,43 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from recipes.models import (
+            Favorite,
+            Ingredient,
+            Recipe,
+            RecipeIngredient,
+            ShoppingCart,
+            Subscription,
+            User,
+        )
+        from recipes.signals import ingredients_loaded
+
+        from . import events, recipe_cache
+        from .slow_queries import install_recorder
+        from .versions import ingredients_changed
+
+        connection_created.connect(install_recorder)
+
+        for signal in (post_save, post_delete):
+            signal.connect(recipe_cache.recipe_changed, sender=Recipe)
+            signal.connect(
+                recipe_cache.recipe_ingredient_changed,
+                sender=RecipeIngredient,
+            )
+            signal.connect(recipe_cache.author_changed, sender=User)
+            signal.connect(ingredients_changed, sender=Ingredient)
+        ingredients_loaded.connect(ingredients_changed)
+
+        post_save.connect(events.recipe_saved, sender=Recipe)
+        post_save.connect(events.subscription_saved, sender=Subscription)
+        post_delete.connect(events.subscription_deleted, sender=Subscription)
+        for model in (Favorite, ShoppingCart):
+            post_save.connect(events.association_saved, sender=model)
+            post_delete.connect(events.association_deleted, sender=model)
@@ -0,0 +1,135 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from io import BytesIO
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+
+from .relations import get_relations
+
+logger = logging.getLogger("foodgram.batch")
+
+# Заголовки внешнего запроса, которые получают вложенные. Авторизация
+# не передаётся: пользователь уже определён и подставляется напрямую.
+FORWARDED_HEADERS = (
+    "HTTP_HOST",
+    "HTTP_X_FORWARDED_FOR",
+    "HTTP_X_FORWARDED_HOST",
+    "HTTP_X_FORWARDED_PROTO",
+    "HTTP_ACCEPT_LANGUAGE",
+    "HTTP_USER_AGENT",
+)
+ASYNC_ERROR = "Асинхронные и потоковые представления недоступны в пакете."
+
+
+def is_async_view(path):
+    """Асинхронное представление (поток событий /api/events/) нельзя
+    вызвать синхронно внутри пакета."""
+    try:
+        match = resolve(path.partition("?")[0])
+    except Resolver404:
+        return False
+    return iscoroutinefunction(match.func)
+
+
+def _sub_request(request, path):
+    path, _, query = path.partition("?")
+    environ = {
+        key: value
+        for key, value in request.META.items()
+        if not key.startswith(("HTTP_", "CONTENT_"))
+        or key in FORWARDED_HEADERS
+    }
+    environ.setdefault("wsgi.url_scheme", request.scheme)
+    environ.update(
+        {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "HTTP_ACCEPT": "application/json",
+            "wsgi.input": BytesIO(),
+        }
+    )
+    sub_request = WSGIRequest(environ)
+    if request.user.is_authenticated:
+        # Аутентификация уже выполнена для внешнего запроса (см. Request
+        # в DRF: _force_auth_user заменяет аутентификаторы представления).
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+    sub_request._user_relations = get_relations(request)
+    return sub_request
+
+
+def _body(response):
+    data = getattr(response, "data", None)
+    if data is not None:
+        return data
+    content = (
+        b"".join(response.streaming_content)
+        if response.streaming
+        else response.content
+    )
+    if response.get("Content-Type", "").startswith("application/json"):
+        return json.loads(content) if content else None
+    return content.decode(response.charset)
+
+
+def run_sub_request(request, item):
+    result = {"id": item.get("id"), "path": item["path"]}
+    sub_request = _sub_request(request, item["path"])
+    try:
+        match = resolve(sub_request.path_info)
+    except Resolver404:
+        return {**result, "status": 404, "body": {"detail": "Не найдено."}}
+    if iscoroutinefunction(match.func):
+        return {**result, "status": 400, "body": {"detail": ASYNC_ERROR}}
+    sub_request.resolver_match = match
+    # Ошибка одного подзапроса не должна превращать весь пакет в 500.
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+        return {
+            **result,
+            "status": response.status_code,
+            "body": _body(response),
+        }
+    except Exception:
+        logger.exception("Ошибка вложенного запроса %s", item["path"])
+        return {
+            **result,
+            "status": 500,
+            "body": {"detail": "Внутренняя ошибка сервера."},
+        }
+
+
+def _run_in_thread(request, item):
+    try:
+        return run_sub_request(request, item)
+    finally:
+        # Соединения потока пула больше никто не использует.
+        connections.close_all()
+
+
+def run_batch(request, items, parallel=False):
+    """Выполняет GET-подзапросы через обычные представления API
+    с общим пользователем и общим кэшем связей текущего запроса."""
+    workers = min(settings.BATCH_MAX_WORKERS, len(items))
+    if not parallel or workers < 2:
+        return [run_sub_request(request, item) for item in items]
+    # Контекст (реплика, атрибуция медленных запросов) копируется
+    # в каждый поток.
+    contexts = [copy_context() for _ in items]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(
+                lambda context, item: context.run(
+                    _run_in_thread, request, item
+                ),
+                contexts,
+                items,
+            )
+        )
@@ -0,0 +1,35 @@
+from django.db import connections
+
+try:
+    from psycopg_pool import PoolTimeout
+except ImportError:
+    PoolTimeout = None
+
+
+def is_pool_timeout(exception):
+    return PoolTimeout is not None and (
+        isinstance(exception, PoolTimeout)
+        or isinstance(exception.__cause__, PoolTimeout)
+    )
+
+
+def pool_stats():
+    """Статистика пулов соединений текущего процесса по алиасам БД."""
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is None:
+            continue
+        data = pool.get_stats()
+        queued = data.get("requests_queued", 0)
+        stats[alias] = {
+            **data,
+            "utilization": (
+                (data["pool_size"] - data["pool_available"])
+                / data["pool_max"]
+            ),
+            "avg_wait_ms": (
+                data.get("requests_wait_ms", 0) / queued if queued else 0.0
+            ),
+        }
+    return stats
@@ -0,0 +1,63 @@
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+def _pin_key(request):
+    credentials = request.headers.get("Authorization") or request.COOKIES.get(
+        settings.SESSION_COOKIE_NAME
+    )
+    if not credentials:
+        return None
+    digest = hashlib.sha1(credentials.encode()).hexdigest()
+    return f"replica-pin:{digest}"
+
+
+def pin_to_primary(request):
+    key = _pin_key(request)
+    if key:
+        cache.set(key, 1, timeout=settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(request):
+    key = _pin_key(request)
+    return key is not None and cache.get(key) is not None
+
+
+def use_replica(enabled=True):
+    return _use_replica.set(enabled)
+
+
+def reset_replica(token):
+    _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """Чтения из помеченных представлений уходят на реплики."""
+
+    # Токены читаются с основной БД: только что выданный токен может ещё
+    # не доехать до реплики.
+    primary_only_apps = {"authtoken", "sessions"}
+
+    def db_for_read(self, model, **hints):
+        if (
+            settings.DATABASE_REPLICAS
+            and _use_replica.get()
+            and model._meta.app_label not in self.primary_only_apps
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
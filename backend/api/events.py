@@ -0,0 +1,233 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("foodgram.events")
+
+# Имя события SSE для моделей связей пользователя с рецептом.
+ASSOCIATION_EVENTS = {
+    "favorite": "favorite",
+    "shoppingcart": "shopping_cart",
+}
+
+
+# Соль отделяет билеты потока от других подписей SECRET_KEY.
+TICKET_SALT = "api.events.ticket"
+
+
+def issue_ticket(user):
+    """Короткоживущий билет на подключение к потоку. EventSource не
+    передаёт заголовки, а токен в адресе попал бы в журналы доступа."""
+    return signing.TimestampSigner(salt=TICKET_SALT).sign(str(user.pk))
+
+
+def ticket_user_id(ticket):
+    """id пользователя из билета или None для поддельного и просроченного."""
+    try:
+        return int(
+            signing.TimestampSigner(salt=TICKET_SALT).unsign(
+                ticket, max_age=settings.EVENTS_TICKET_MAX_AGE
+            )
+        )
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def author_channel(author_id):
+    return f"author:{author_id}"
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+class LocalBackend:
+    """Доставка только внутри процесса (runserver, один ASGI-процесс)."""
+
+    def __init__(self):
+        self.loop = None
+        self.dispatch = None
+
+    def publish(self, message):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.dispatch, message)
+
+    async def listen(self, dispatch):
+        self.loop, self.dispatch = asyncio.get_running_loop(), dispatch
+        await asyncio.Event().wait()
+
+
+class PostgresBackend:
+    """Доставка между процессами через LISTEN/NOTIFY PostgreSQL: одно
+    соединение на ASGI-процесс, сколько бы клиентов ни было подключено."""
+
+    channel = "foodgram_events"
+    reconnect_delay = 1
+
+    def publish(self, message):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, %s)",
+                [self.channel, json.dumps(message, ensure_ascii=False)],
+            )
+
+    def connection_params(self):
+        database = settings.DATABASES["default"]
+        return {
+            "dbname": database["NAME"],
+            "user": database["USER"],
+            "password": database["PASSWORD"],
+            "host": database["HOST"],
+            "port": database["PORT"],
+        }
+
+    async def listen(self, dispatch):
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    autocommit=True, **self.connection_params()
+                ) as listener:
+                    await listener.execute(f"LISTEN {self.channel}")
+                    async for notify in listener.notifies():
+                        dispatch(json.loads(notify.payload))
+            except psycopg.OperationalError:
+                logger.exception("Потеряно соединение LISTEN, переподключение")
+                await asyncio.sleep(self.reconnect_delay)
+
+
+class Broker:
+    """Раздаёт события очередям подключённых клиентов по каналам.
+
+    Публикация идёт через backend после фиксации транзакции; приём
+    запускается в ASGI-процессе при первом подключении клиента.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.queues = defaultdict(set)
+        self._listener = None
+
+    def publish(self, channel, event, data):
+        message = {"channel": channel, "event": event, "data": data}
+        transaction.on_commit(lambda: self.backend.publish(message))
+
+    def ensure_listening(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(
+                self.backend.listen(self.dispatch)
+            )
+
+    def dispatch(self, message):
+        for queue in tuple(self.queues.get(message["channel"], ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Клиент не успевает читать: событие для него теряется,
+                # остальные не ждут.
+                pass
+
+    def subscribe(self, queue, *channels):
+        for channel in channels:
+            self.queues[channel].add(queue)
+
+    def unsubscribe(self, queue, *channels):
+        for channel in channels:
+            queues = self.queues.get(channel)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self.queues[channel]
+
+
+broker = Broker(import_string(settings.EVENTS_BACKEND)())
+
+
+def format_event(event, data):
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def stream_events(user_id, author_ids):
+    """Поток SSE пользователя. Пока событий нет, клиент стоит только
+    пустой очереди и раз в EVENTS_HEARTBEAT секунд строки-комментария."""
+    queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+    channels = {user_channel(user_id)}
+    channels.update(author_channel(author_id) for author_id in author_ids)
+    broker.ensure_listening()
+    broker.subscribe(queue, *channels)
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    queue.get(), settings.EVENTS_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if message["event"] == "subscription":
+                channel = author_channel(message["data"]["author"])
+                if message["data"]["action"] == "added":
+                    channels.add(channel)
+                    broker.subscribe(queue, channel)
+                else:
+                    channels.discard(channel)
+                    broker.unsubscribe(queue, channel)
+            yield format_event(message["event"], message["data"])
+    finally:
+        broker.unsubscribe(queue, *channels)
+
+
+def recipe_saved(sender, instance, created, **kwargs):
+    if created:
+        broker.publish(
+            author_channel(instance.author_id),
+            "recipe",
+            {
+                "id": instance.pk,
+                "author": instance.author_id,
+                "name": instance.name,
+            },
+        )
+
+
+def _association_event(sender, instance, action):
+    broker.publish(
+        user_channel(instance.user_id),
+        ASSOCIATION_EVENTS[sender._meta.model_name],
+        {"recipe": instance.recipe_id, "action": action},
+    )
+
+
+def association_saved(sender, instance, created, **kwargs):
+    if created:
+        _association_event(sender, instance, "added")
+
+
+def association_deleted(sender, instance, **kwargs):
+    _association_event(sender, instance, "removed")
+
+
+def _subscription_event(instance, action):
+    broker.publish(
+        user_channel(instance.subscriber_id),
+        "subscription",
+        {"author": instance.author_id, "action": action},
+    )
+
+
+def subscription_saved(sender, instance, created, **kwargs):
+    if created:
+        _subscription_event(instance, "added")
+
+
+def subscription_deleted(sender, instance, **kwargs):
+    _subscription_event(instance, "removed")
@@ -0,0 +1,130 @@
+from operator import itemgetter
+
+from recipes.models import Recipe, RecipeIngredient, User
+
+from .relations import FAVORITED, IN_SHOPPING_CART, SUBSCRIBED, get_relations
+
+USER_FIELDS = ("username", "first_name", "last_name", "id", "email")
+USER_COLUMNS = USER_FIELDS + ("avatar",)
+
+RECIPE_COLUMNS = (
+    "id",
+    "name",
+    "image",
+    "text",
+    "cooking_time",
+    *(f"author__{field}" for field in USER_COLUMNS),
+)
+
+INGREDIENT_COLUMNS = (
+    "recipe_id",
+    "ingredient_id",
+    "ingredient__name",
+    "ingredient__measurement_unit",
+    "amount",
+)
+
+_user_getter = itemgetter(*range(len(USER_FIELDS)))
+_recipe_author_getter = itemgetter(*range(5, 5 + len(USER_FIELDS)))
+_avatar_storage = User._meta.get_field("avatar").storage
+_image_storage = Recipe._meta.get_field("image").storage
+
+
+def _file_url(storage, name):
+    return storage.url(name) if name else None
+
+
+def _absolute_url(request, url):
+    return url and request.build_absolute_uri(url)
+
+
+def user_rows(queryset):
+    return queryset.values_list(*USER_COLUMNS)
+
+
+def recipe_rows(queryset):
+    return queryset.values_list(*RECIPE_COLUMNS)
+
+
+def _user_dict(request, values, avatar, subscribed):
+    data = dict(zip(USER_FIELDS, values))
+    data["is_subscribed"] = subscribed
+    data["avatar"] = _absolute_url(
+        request, _file_url(_avatar_storage, avatar)
+    )
+    return data
+
+
+def render_users(rows, request):
+    """Повторяет UserProfileSerializer(many=True) для строк user_rows()."""
+    subscribed = get_relations(request).related(
+        SUBSCRIBED, [row[3] for row in rows]
+    )
+    return [
+        _user_dict(request, _user_getter(row), row[-1], row[3] in subscribed)
+        for row in rows
+    ]
+
+
+def recipe_fragments(rows):
+    """Общая для всех пользователей часть RecipeListSerializer:
+    флаги выключены, URL файлов относительные (см. overlay_recipes)."""
+    recipe_ids = [row[0] for row in rows]
+    ingredients = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, *values in (
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("ingredient__name")
+        .values_list(*INGREDIENT_COLUMNS)
+    ):
+        ingredients[recipe_id].append(
+            dict(zip(("id", "name", "measurement_unit", "amount"), values))
+        )
+
+    return [
+        {
+            "id": row[0],
+            "author": {
+                **dict(zip(USER_FIELDS, _recipe_author_getter(row))),
+                "is_subscribed": False,
+                "avatar": _file_url(_avatar_storage, row[-1]),
+            },
+            "ingredients": ingredients[row[0]],
+            "is_favorited": False,
+            "is_in_shopping_cart": False,
+            "name": row[1],
+            "image": _file_url(_image_storage, row[2]),
+            "text": row[3],
+            "cooking_time": row[4],
+        }
+        for row in rows
+    ]
+
+
+def overlay_recipes(fragments, request):
+    """Подставляет во фрагменты флаги текущего пользователя и полные URL."""
+    relations = get_relations(request)
+    recipe_ids = [fragment["id"] for fragment in fragments]
+    subscribed = relations.related(
+        SUBSCRIBED, {fragment["author"]["id"] for fragment in fragments}
+    )
+    favorited = relations.related(FAVORITED, recipe_ids)
+    in_cart = relations.related(IN_SHOPPING_CART, recipe_ids)
+    return [
+        {
+            **fragment,
+            "author": {
+                **fragment["author"],
+                "is_subscribed": fragment["author"]["id"] in subscribed,
+                "avatar": _absolute_url(request, fragment["author"]["avatar"]),
+            },
+            "is_favorited": fragment["id"] in favorited,
+            "is_in_shopping_cart": fragment["id"] in in_cart,
+            "image": _absolute_url(request, fragment["image"]),
+        }
+        for fragment in fragments
+    ]
+
+
+def render_recipes(rows, request):
+    """Повторяет RecipeListSerializer(many=True) для строк recipe_rows()."""
+    return overlay_recipes(recipe_fragments(rows), request)
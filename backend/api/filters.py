@@ -1,5 +1,16 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
-from recipes.models import Recipe
+from recipes.models import Favorite, Recipe, RecipeIngredient, ShoppingCart
+
+
+class IdInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
+def related_exists(model, **lookups):
+    """Коррелированный EXISTS по связанной с рецептом таблице: без JOIN
+    и размножения строк, проверка идёт по индексу на (recipe, ...)."""
+    return Exists(model.objects.filter(recipe=OuterRef("pk"), **lookups))
 
 
 class RecipeFilter(filters.FilterSet):
@@ -7,23 +18,58 @@ class RecipeFilter(filters.FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method="filter_is_in_shopping_cart"
     )
+    cooking_time_min = filters.NumberFilter(
+        field_name="cooking_time", lookup_expr="gte"
+    )
+    cooking_time_max = filters.NumberFilter(
+        field_name="cooking_time", lookup_expr="lte"
+    )
+    ingredients_all = IdInFilter(method="filter_ingredients_all")
+    ingredients_any = IdInFilter(method="filter_ingredients_any")
+    ingredients_exclude = IdInFilter(method="filter_ingredients_exclude")
+    ordering = filters.ChoiceFilter(
+        choices=(("popular", "Популярные"), ("trending", "Популярные сейчас")),
+        method="filter_ordering",
+    )
+
+    ORDERINGS = {
+        "popular": ("-popularity", "-pub_date"),
+        "trending": ("-trending_score", "-pub_date"),
+    }
 
     class Meta:
         model = Recipe
         fields = ["author", "is_favorited", "is_in_shopping_cart"]
 
     def filter_is_favorited(self, recipes, name, value):
-        if not self.request.user.is_authenticated:
+        if not self.request.user.is_authenticated or not value:
             return recipes
-
-        if value:
-            return recipes.filter(favorite_set__user=self.request.user)
-        return recipes
+        return recipes.filter(related_exists(Favorite, user=self.request.user))
 
     def filter_is_in_shopping_cart(self, recipes, name, value):
         if not self.request.user.is_authenticated:
             return recipes
+        in_cart = related_exists(ShoppingCart, user=self.request.user)
+        return recipes.filter(in_cart if value else ~in_cart)
+
+    def filter_ingredients_all(self, recipes, name, value):
+        return recipes.filter(
+            *(
+                related_exists(RecipeIngredient, ingredient_id=ingredient_id)
+                for ingredient_id in set(value)
+            )
+        )
+
+    def filter_ingredients_any(self, recipes, name, value):
+        return recipes.filter(
+            related_exists(RecipeIngredient, ingredient_id__in=value)
+        )
+
+    def filter_ingredients_exclude(self, recipes, name, value):
+        return recipes.filter(
+            ~related_exists(RecipeIngredient, ingredient_id__in=value)
+        )
 
-        if value:
-            return recipes.filter(shoppingcart_set__user=self.request.user)
-        return recipes.exclude(shoppingcart_set__user=self.request.user)
+    def filter_ordering(self, recipes, name, value):
+        # Оценки пересчитывает update_trending, сырые таблицы не читаются.
+        return recipes.order_by(*self.ORDERINGS[value])
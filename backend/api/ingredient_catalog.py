@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+from threading import Lock
+
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse, HttpResponseNotModified
+from recipes.models import Ingredient
+from rest_framework.renderers import JSONRenderer
+
+from .versions import INGREDIENTS_VERSION, get_versions
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Кодировки в порядке предпочтения; None — без сжатия.
+ENCODINGS = ("br", "gzip", None)
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class IngredientCatalog:
+    """Весь справочник ингредиентов, заранее отрендеренный в JSON
+    и сжатый; пересобирается в процессе при смене версии справочника."""
+
+    def __init__(self):
+        self.version = None
+        self.variants = {}
+        self._lock = Lock()
+
+    def _build(self, version):
+        # Версия прочитана до данных, поэтому чтение идёт с основной БД:
+        # отставшая реплика дала бы старый справочник под новой версией.
+        body = JSONRenderer().render(
+            [
+                {"id": pk, "name": name, "measurement_unit": unit}
+                for pk, name, unit in Ingredient.objects.using(
+                    DEFAULT_DB_ALIAS
+                ).values_list("id", "name", "measurement_unit")
+            ]
+        )
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        variants = {
+            None: (body, f'"{digest}"'),
+            "gzip": (gzip.compress(body, mtime=0), f'"{digest}-gzip"'),
+        }
+        if brotli is not None:
+            variants["br"] = (brotli.compress(body), f'"{digest}-br"')
+        self.variants, self.version = variants, version
+
+    def get_variants(self):
+        version = get_versions([INGREDIENTS_VERSION])[INGREDIENTS_VERSION]
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._build(version)
+        return self.variants
+
+    def response(self, request):
+        variants = self.get_variants()
+        accepted = _accepted_encodings(
+            request.headers.get("Accept-Encoding", "")
+        )
+        encoding = next(
+            coding
+            for coding in ENCODINGS
+            if coding in variants and (coding is None or coding in accepted)
+        )
+        body, etag = variants[encoding]
+        etags = {tag for _, tag in variants.values()}
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etags & {tag.strip() for tag in if_none_match.split(",")}:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type="application/json")
+            if encoding is not None:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        response["Vary"] = "Accept-Encoding"
+        return response
+
+
+catalog = IngredientCatalog()
@@ -0,0 +1,180 @@
+from collections import Counter, defaultdict
+from threading import Lock
+
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import F
+from recipes.models import Ingredient
+
+from .versions import INGREDIENTS_VERSION, get_versions
+
+# Сколько ингредиентов возвращает нечёткий поиск.
+LIMIT = 20
+# Минимальная доля триграмм запроса, найденных в названии.
+THRESHOLD = 0.4
+# Сколько кандидатов по триграммам перепроверяется расстоянием правки.
+CANDIDATES = 100
+# Бонус за совпавшее начало слова при ранжировании.
+PREFIX_LENGTH = 4
+PREFIX_WEIGHT = 0.5
+
+_trigram_extension = {}
+
+
+def normalize(text):
+    return text.lower().replace("ё", "е").strip()
+
+
+def trigrams(word):
+    # Как в pg_trgm: слово дополняется двумя пробелами слева и одним справа.
+    padded = f"  {word} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def levenshtein(first, second):
+    previous = list(range(len(second) + 1))
+    for index, char in enumerate(first, 1):
+        current = [index]
+        for other_index, other_char in enumerate(second, 1):
+            current.append(
+                min(
+                    previous[other_index] + 1,
+                    current[other_index - 1] + 1,
+                    previous[other_index - 1] + (char != other_char),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+def _common_prefix(first, second):
+    length = 0
+    for char, other_char in zip(first, second):
+        if char != other_char:
+            break
+        length += 1
+    return length
+
+
+def _distance(query, name):
+    # Запрос обычно — начало слова, поэтому сравнивается с префиксом той
+    # же длины у названия целиком и у каждого его слова. Опечатки реже
+    # бывают в первых буквах: совпавшее начало (до PREFIX_LENGTH букв)
+    # уменьшает расстояние, как в метрике Джаро — Винклера.
+    return min(
+        levenshtein(query, part[:len(query)])
+        - PREFIX_WEIGHT * min(_common_prefix(query, part), PREFIX_LENGTH)
+        for part in (name, *name.split())
+    )
+
+
+class IngredientIndex:
+    """Инвертированный индекс триграмм названий ингредиентов в памяти
+    процесса; пересобирается при смене версии справочника."""
+
+    def __init__(self):
+        self.version = None
+        self.rows = {}
+        self.postings = {}
+        self._lock = Lock()
+
+    def _build(self, version):
+        rows, postings = {}, defaultdict(list)
+        # Версия прочитана до данных — см. IngredientCatalog._build.
+        for pk, name, unit in Ingredient.objects.using(
+            DEFAULT_DB_ALIAS
+        ).values_list("id", "name", "measurement_unit"):
+            normalized = normalize(name)
+            rows[pk] = (normalized, name, unit)
+            grams = set()
+            for word in normalized.split():
+                grams |= trigrams(word)
+            for gram in grams:
+                postings[gram].append(pk)
+        self.rows, self.postings, self.version = rows, dict(postings), version
+
+    def refresh(self):
+        version = get_versions([INGREDIENTS_VERSION])[INGREDIENTS_VERSION]
+        if version != self.version:
+            with self._lock:
+                if version != self.version:
+                    self._build(version)
+
+    def search(self, query, limit=LIMIT):
+        self.refresh()
+        query = normalize(query)
+        grams = set()
+        for word in query.split():
+            grams |= trigrams(word)
+        if not grams:
+            return []
+        rows, postings = self.rows, self.postings
+        counts = Counter()
+        for gram in grams:
+            counts.update(postings.get(gram, ()))
+        minimum = THRESHOLD * len(grams)
+        candidates = [
+            pk
+            for pk, shared in counts.most_common(CANDIDATES)
+            if shared >= minimum
+        ]
+        ranked = sorted(
+            candidates,
+            key=lambda pk: (
+                _distance(query, rows[pk][0]),
+                len(rows[pk][0]),
+                rows[pk][0],
+            ),
+        )
+        return [
+            {"id": pk, "name": rows[pk][1], "measurement_unit": rows[pk][2]}
+            for pk in ranked[:limit]
+        ]
+
+
+index = IngredientIndex()
+
+
+def has_trigram_extension(alias):
+    if alias not in _trigram_extension:
+        connection = connections[alias]
+        if connection.vendor != "postgresql":
+            _trigram_extension[alias] = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT EXISTS("
+                    "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+                )
+                _trigram_extension[alias] = cursor.fetchone()[0]
+    return _trigram_extension[alias]
+
+
+def _trigram_search(alias, query, limit):
+    from django.contrib.postgres.lookups import TrigramWordSimilar
+    from django.contrib.postgres.search import TrigramWordSimilarity
+
+    # name %> запрос проверяется по GIN-индексу ingredient_name_trgm_idx;
+    # порог по умолчанию (0.6) слишком строг для опечаток.
+    with transaction.atomic(using=alias):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config("
+                "'pg_trgm.word_similarity_threshold', %s, true)",
+                [str(THRESHOLD)],
+            )
+        return list(
+            Ingredient.objects.using(alias)
+            .filter(TrigramWordSimilar(F("name"), query))
+            .annotate(similarity=TrigramWordSimilarity(query, "name"))
+            .order_by("-similarity", "name")
+            .values("id", "name", "measurement_unit")[:limit]
+        )
+
+
+def fuzzy_search(query, limit=LIMIT):
+    """Ингредиенты с названием, похожим на query, от более похожих.
+    pg_trgm, если расширение установлено, иначе индекс в памяти."""
+    alias = router.db_for_read(Ingredient)
+    if has_trigram_extension(alias):
+        return _trigram_search(alias, query, limit)
+    return index.search(query, limit)
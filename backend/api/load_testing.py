@@ -0,0 +1,487 @@
+"""Нагрузочное тестирование: смешанный трафик из запросов Postman-коллекции.
+
+Виртуальные пользователи (по одному соединению keep-alive на каждого)
+повторяют взвешенные сценарии, собранные из запросов коллекции, и
+считают задержки и ошибки по каждому запросу. Ожидаемый статус берётся
+из тестов коллекции; сценарий прерывается на первом неожиданном ответе,
+как сделал бы настоящий клиент.
+"""
+import asyncio
+import json
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from math import ceil
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+from django.db.models import Count
+from recipes.models import Ingredient, Recipe, User
+from recipes.seeding import power_law_rank
+from rest_framework.authtoken.models import Token
+
+COLLECTION_PATH = (
+    settings.BASE_DIR.parent
+    / "postman_collection"
+    / "foodgram.postman_collection.json"
+)
+
+# Сценарий: вес в общем потоке и последовательность запросов коллекции.
+SCENARIOS = {
+    "browse_feed": (
+        50,
+        ("get_recipes_list // User", "get_recipe_detail // User"),
+    ),
+    "search": (20, ("get_ingredients_list_with_name_filter // User",)),
+    "toggle_favorite": (
+        15,
+        ("add_to_favorite // User", "remove_from_favorite // User"),
+    ),
+    "download_cart": (
+        5,
+        (
+            "add_to_shopping_cart // User",
+            "download_shopping_cart // User",
+            "remove_from_shopping_cart // User",
+        ),
+    ),
+    "subscribe": (
+        10,
+        (
+            "create_subscription // User",
+            "get_subscription_list_with_recipes_limit_param // User",
+            "delete_first_subscription // User",
+        ),
+    ),
+}
+
+PERCENTILES = (50, 90, 99)
+
+_VARIABLE = re.compile(r"{{(\w+)}}")
+_EXPECTED_STATUS = re.compile(r"Статус-код ответа должен быть (\d{3})")
+
+
+class HTTPError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class CollectionRequest:
+    name: str
+    method: str
+    url: str
+    headers: tuple
+    body: str
+    expected_status: int
+
+
+def _auth_header(auth):
+    if auth is None or auth["type"] != "apikey":
+        return ()
+    values = {item["key"]: item["value"] for item in auth["apikey"]}
+    return ((values["key"], values["value"]),)
+
+
+def _expected_status(item):
+    for event in item.get("event", ()):
+        if event["listen"] == "test":
+            match = _EXPECTED_STATUS.search("\n".join(event["script"]["exec"]))
+            if match:
+                return int(match[1])
+    return None
+
+
+def _walk(items, auth):
+    for item in items:
+        item_auth = item.get("auth", auth)
+        if "item" in item:
+            yield from _walk(item["item"], item_auth)
+            continue
+        request = item["request"]
+        headers = tuple(
+            (header["key"], header["value"])
+            for header in request.get("header", ())
+            if not header.get("disabled")
+        ) + _auth_header(request.get("auth", item_auth))
+        body = request.get("body") or {}
+        yield CollectionRequest(
+            name=item["name"],
+            method=request["method"],
+            url=request["url"]["raw"],
+            headers=headers,
+            body=body.get("raw", "") if body.get("mode") == "raw" else "",
+            expected_status=_expected_status(item),
+        )
+
+
+def load_collection(path=COLLECTION_PATH):
+    """Запросы коллекции по имени (при повторе имени — первый) и
+    значения переменных коллекции по умолчанию."""
+    with open(path, encoding="utf-8") as source:
+        collection = json.load(source)
+    requests = {}
+    for request in _walk(collection["item"], collection.get("auth")):
+        requests.setdefault(request.name, request)
+    variables = {
+        variable["key"]: variable["value"]
+        for variable in collection.get("variable", ())
+    }
+    return requests, variables
+
+
+def render(template, variables, escape=False):
+    """Подставляет {{переменные}}; escape — для URL: baseUrl остаётся
+    как есть, а ?, & и прочее в значениях кодируются."""
+
+    def replace(match):
+        value = str(variables[match[1]])
+        return quote(value, safe=":/") if escape else value
+
+    try:
+        return _VARIABLE.sub(replace, template)
+    except KeyError as error:
+        raise HTTPError(f"Не задана переменная {error.args[0]}") from None
+
+
+class Client:
+    """Минимальный HTTP/1.1-клиент поверх asyncio с keep-alive."""
+
+    def __init__(self, host, port, timeout):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, target, headers, body=b""):
+        return await asyncio.wait_for(
+            self._request(method, target, headers, body), self.timeout
+        )
+
+    async def _request(self, method, target, headers, body):
+        reused = self.writer is not None
+        if not reused:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        lines = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(body)}",
+            *(f"{key}: {value}" for key, value in headers),
+        ]
+        self.writer.write(
+            ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+        )
+        try:
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+        except ConnectionError:
+            status_line = b""
+        if not status_line:
+            # Сервер закрыл простаивавшее соединение: повторяем один раз.
+            await self.close()
+            if reused:
+                return await self._request(method, target, headers, body)
+            raise HTTPError("Соединение закрыто сервером")
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HTTPError(f"Некорректный ответ: {status_line!r}") from None
+        response_headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            key, _, value = line.decode("latin-1").partition(":")
+            response_headers[key.strip().lower()] = value.strip()
+        content = await self._read_body(response_headers)
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, content
+
+    async def _read_body(self, headers):
+        if "content-length" in headers:
+            return await self.reader.readexactly(
+                int(headers["content-length"])
+            )
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while size := int(
+                (await self.reader.readline()).split(b";")[0], 16
+            ):
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            while await self.reader.readline() not in (b"\r\n", b""):
+                pass
+            return b"".join(chunks)
+        content = await self.reader.read()
+        await self.close()
+        return content
+
+
+@dataclass
+class RequestStats:
+    latencies: list = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+    def add(self, latency, outcome, ok):
+        self.latencies.append(latency)
+        self.statuses[outcome] += 1
+        self.errors += not ok
+
+
+def percentile(values, percent):
+    """Процентиль по методу ближайшего ранга; values отсортированы."""
+    return values[max(ceil(len(values) * percent / 100) - 1, 0)]
+
+
+@dataclass(frozen=True)
+class Workload:
+    """Данные для подстановки в переменные коллекции: пользователи с
+    токенами и объекты, упорядоченные по популярности."""
+
+    users: tuple
+    recipe_ids: tuple
+    author_ids: tuple
+    ingredient_names: tuple
+    skew: float
+
+
+def prepare_workload(users, skew):
+    """Активные пользователи с токенами (создаются при отсутствии)."""
+    chosen = list(
+        User.objects.filter(is_active=True, is_staff=False).order_by("id")[
+            :users
+        ]
+    )
+    return Workload(
+        users=tuple(
+            (user.id, Token.objects.get_or_create(user=user)[0].key)
+            for user in chosen
+        ),
+        recipe_ids=tuple(
+            Recipe.objects.order_by("-popularity", "-pub_date").values_list(
+                "id", flat=True
+            )
+        ),
+        author_ids=tuple(
+            User.objects.annotate(recipes_total=Count("recipes"))
+            .filter(recipes_total__gt=0)
+            .order_by("-recipes_total", "id")
+            .values_list("id", flat=True)
+        ),
+        ingredient_names=tuple(
+            Ingredient.objects.values_list("name", flat=True)
+        ),
+        skew=skew,
+    )
+
+
+def _popular(rng, items, skew):
+    return items[power_law_rank(rng, len(items), skew)]
+
+
+def _variables(rng, workload, user_id, token, defaults):
+    author_id = _popular(rng, workload.author_ids, workload.skew)
+    while author_id == user_id and len(workload.author_ids) > 1:
+        author_id = rng.choice(workload.author_ids)
+    name = rng.choice(workload.ingredient_names)
+    return {
+        **defaults,
+        "userToken": token,
+        "userId": user_id,
+        "firstRecipeId": _popular(rng, workload.recipe_ids, workload.skew),
+        "thirdUserId": author_id,
+        "ingredientNameFirstLatter": name[: rng.randint(1, 4)],
+    }
+
+
+def _target(url):
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+class LoadTest:
+    """Прогон: concurrency виртуальных пользователей в течение duration
+    секунд; статистика копится в stats по именам запросов коллекции."""
+
+    def __init__(
+        self,
+        base_url,
+        workload,
+        seed=0,
+        timeout=30,
+        scenarios=None,
+        collection_path=COLLECTION_PATH,
+    ):
+        self.requests, defaults = load_collection(collection_path)
+        self.defaults = {**defaults, "baseUrl": base_url.rstrip("/")}
+        self.url = urlsplit(base_url)
+        self.workload = workload
+        self.seed = seed
+        self.timeout = timeout
+        self.scenarios = [
+            name
+            for name in SCENARIOS
+            if scenarios is None or name in scenarios
+        ]
+        self.weights = [SCENARIOS[name][0] for name in self.scenarios]
+        self.stats = defaultdict(RequestStats)
+
+    async def _step(self, client, request, variables):
+        """Выполняет запрос коллекции; False — сценарий прерывается."""
+        headers = [
+            (key, render(value, variables)) for key, value in request.headers
+        ]
+        body = render(request.body, variables).encode()
+        if body:
+            headers.append(("Content-Type", "application/json"))
+        started = time.perf_counter()
+        try:
+            status, _ = await client.request(
+                request.method,
+                _target(render(request.url, variables, escape=True)),
+                headers,
+                body,
+            )
+        except (
+            OSError,
+            HTTPError,
+            asyncio.IncompleteReadError,
+            asyncio.TimeoutError,
+        ) as error:
+            self.stats[request.name].add(
+                time.perf_counter() - started, type(error).__name__, False
+            )
+            await client.close()
+            return False
+        ok = status == request.expected_status or (
+            request.expected_status is None and status < 400
+        )
+        self.stats[request.name].add(time.perf_counter() - started, status, ok)
+        return ok
+
+    async def virtual_user(self, number, deadline):
+        rng = random.Random(f"{self.seed}:{number}")
+        workload = self.workload
+        user_id, token = workload.users[number % len(workload.users)]
+        client = Client(self.url.hostname, self.url.port or 80, self.timeout)
+        loop = asyncio.get_running_loop()
+        try:
+            while loop.time() < deadline:
+                (scenario,) = rng.choices(self.scenarios, self.weights)
+                variables = _variables(
+                    rng, workload, user_id, token, self.defaults
+                )
+                for step in SCENARIOS[scenario][1]:
+                    if not await self._step(
+                        client, self.requests[step], variables
+                    ):
+                        break
+        finally:
+            await client.close()
+
+    async def run(self, concurrency, duration):
+        """Возвращает фактическую длительность прогона в секундах."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.gather(
+            *(
+                self.virtual_user(number, started + duration)
+                for number in range(concurrency)
+            )
+        )
+        return loop.time() - started
+
+
+def summarize(stats, elapsed):
+    """Строки отчёта: запрос, число, RPS, процентили и максимум (мс),
+    доля ошибок и неожиданные статусы. Последняя строка — итог."""
+    rows = []
+    everything = RequestStats()
+    for name in sorted(stats):
+        item = stats[name]
+        everything.latencies.extend(item.latencies)
+        everything.statuses.update(item.statuses)
+        everything.errors += item.errors
+        rows.append(_summary_row(name, item, elapsed))
+    if everything.latencies:
+        rows.append(_summary_row("всего", everything, elapsed))
+    return rows
+
+
+def _summary_row(name, item, elapsed):
+    latencies = sorted(item.latencies)
+    total = len(latencies)
+    return {
+        "request": name,
+        "count": total,
+        "rps": total / elapsed,
+        **{
+            f"p{percent}": percentile(latencies, percent) * 1000
+            for percent in PERCENTILES
+        },
+        "max": latencies[-1] * 1000,
+        "error_rate": item.errors / total,
+        "statuses": dict(item.statuses),
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(workers=1, startup_timeout=30):
+    """uvicorn с config.asgi на свободном порту; отдаёт базовый URL."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "config.asgi:application",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--no-access-log",
+            "--log-level",
+            "warning",
+        ],
+        cwd=settings.BASE_DIR,
+    )
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise HTTPError("Сервер завершился при запуске")
+            try:
+                socket.create_connection(("127.0.0.1", port), 0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise HTTPError("Сервер не запустился вовремя") from None
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
@@ -0,0 +1,78 @@
+from timeit import timeit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from recipes.models import Recipe, User
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api import fast_serializers
+from api.serializers import RecipeListSerializer, UserProfileSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение ModelSerializer и быстрого пути сериализации "
+        "списков рецептов и пользователей"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="6,20,50,100",
+            help="Размеры страниц через запятую",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--email", help="Пользователь, от имени которого идут запросы"
+        )
+
+    def handle(self, *args, **options):
+        request = Request(
+            RequestFactory().get("/api/", HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        )
+        if options["email"]:
+            request.user = User.objects.get(email=options["email"])
+        cases = (
+            (
+                "recipes",
+                Recipe.objects.all(),
+                RecipeListSerializer,
+                fast_serializers.recipe_rows,
+                fast_serializers.render_recipes,
+            ),
+            (
+                "users",
+                User.objects.all(),
+                UserProfileSerializer,
+                fast_serializers.user_rows,
+                fast_serializers.render_users,
+            ),
+        )
+        renderer = JSONRenderer()
+        for size in map(int, options["sizes"].split(",")):
+            for name, queryset, serializer_class, rows, render in cases:
+
+                def slow():
+                    return serializer_class(
+                        list(queryset[:size]),
+                        many=True,
+                        context={"request": request},
+                    ).data
+
+                def fast():
+                    return render(list(rows(queryset)[:size]), request)
+
+                if renderer.render(slow()) != renderer.render(fast()):
+                    raise CommandError(
+                        f"Ответы {name} (limit={size}) не совпадают"
+                    )
+                slow_time = timeit(slow, number=options["repeat"])
+                fast_time = timeit(fast, number=options["repeat"])
+                self.stdout.write(
+                    f"{name:<8} limit={size:<4} "
+                    f"serializer={slow_time / options['repeat'] * 1000:.2f}мс "
+                    f"values={fast_time / options['repeat'] * 1000:.2f}мс "
+                    f"x{slow_time / fast_time:.1f}"
+                )
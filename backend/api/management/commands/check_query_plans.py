@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    Subscription,
+    User,
+)
+
+from api.filters import RecipeFilter
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN основных запросов API; ошибка, если в плане остался "
+        "Seq Scan (только PostgreSQL)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plans", action="store_true")
+
+    def filtered(self, user, **params):
+        return RecipeFilter(
+            params, Recipe.objects.all(), request=SimpleNamespace(user=user)
+        ).qs[:6]
+
+    def get_querysets(self, user):
+        ingredients = ",".join(
+            str(pk)
+            for pk in RecipeIngredient.objects.values_list(
+                "ingredient_id", flat=True
+            )[:2]
+        )
+        return {
+            "recipes-list": Recipe.objects.all()[:6],
+            "recipes-by-author": Recipe.objects.filter(author=user)[:6],
+            "recipes-favorited": self.filtered(user, is_favorited="1"),
+            "recipes-in-cart": self.filtered(user, is_in_shopping_cart="1"),
+            "recipes-not-in-cart": self.filtered(
+                user, is_in_shopping_cart="0"
+            ),
+            "recipes-cooking-time": self.filtered(
+                user, cooking_time_min="10", cooking_time_max="30"
+            ),
+            "recipes-ingredients-all": self.filtered(
+                user, ingredients_all=ingredients
+            ),
+            "recipes-ingredients-any": self.filtered(
+                user, ingredients_any=ingredients
+            ),
+            "recipes-ingredients-exclude": self.filtered(
+                user, ingredients_exclude=ingredients
+            ),
+            "subscriptions": user.subscriptions.select_related("author"),
+            "subscribers": Subscription.objects.filter(author=user),
+            "ingredients-prefix": Ingredient.objects.filter(
+                name__istartswith="кар"
+            ),
+            "download-shopping-cart": (
+                RecipeIngredient.objects.filter(
+                    recipe__shoppingcart_set__user=user
+                )
+                .values("ingredient__name", "ingredient__measurement_unit")
+                .annotate(total_amount=models.Sum("amount"))
+            ),
+        }
+
+    def explain(self, queryset):
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # Без seq scan планировщик выбирает индекс, если он есть;
+                # оставшийся Seq Scan означает, что индекса нет.
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Проверка планов доступна только в PostgreSQL.")
+        user = User.objects.order_by("pk").first()
+        if user is None:
+            raise CommandError("Нет данных: заполните базу перед проверкой.")
+
+        failed = []
+        for name, queryset in self.get_querysets(user).items():
+            plan = self.explain(queryset)
+            if options["verbose_plans"]:
+                self.stdout.write(f"{name}:\n{plan}\n")
+            if "Seq Scan" in plan:
+                failed.append(name)
+                self.stdout.write(self.style.ERROR(f"{name}: Seq Scan"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name}: OK"))
+
+        if failed:
+            raise CommandError(f"Seq Scan в запросах: {', '.join(failed)}")
@@ -0,0 +1,143 @@
+import asyncio
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.load_testing import (
+    COLLECTION_PATH,
+    PERCENTILES,
+    SCENARIOS,
+    HTTPError,
+    LoadTest,
+    local_server,
+    prepare_workload,
+    summarize,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест: взвешенные сценарии из запросов Postman-коллекции "
+        "с заданной конкурентностью; RPS, процентили задержек и доля ошибок "
+        "по каждому запросу"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help=(
+                "Адрес запущенного сервера; по умолчанию uvicorn "
+                "запускается локально на свободном порту"
+            ),
+        )
+        parser.add_argument(
+            "--server-workers",
+            type=int,
+            default=1,
+            help="Число процессов uvicorn для локального сервера",
+        )
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Секунды"
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            help=(
+                "Сколько пользователей задействовать (по умолчанию — "
+                "по одному на виртуального пользователя)"
+            ),
+        )
+        parser.add_argument(
+            "--scenarios",
+            help=(
+                "Сценарии через запятую, по умолчанию все: "
+                + ", ".join(
+                    f"{name} ({weight})"
+                    for name, (weight, _) in SCENARIOS.items()
+                )
+            ),
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.0,
+            help="Степень концентрации запросов на популярных рецептах",
+        )
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--collection", default=COLLECTION_PATH)
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["duration"] <= 0:
+            raise CommandError(
+                "--concurrency и --duration должны быть положительными"
+            )
+        scenarios = None
+        if options["scenarios"]:
+            scenarios = set(options["scenarios"].split(","))
+            if unknown := scenarios - set(SCENARIOS):
+                raise CommandError(
+                    f"Неизвестные сценарии: {', '.join(sorted(unknown))}"
+                )
+        workload = prepare_workload(
+            options["users"] or options["concurrency"], options["skew"]
+        )
+        if not (
+            workload.users and workload.recipe_ids and workload.author_ids
+        ):
+            raise CommandError(
+                "Нет пользователей или рецептов: заполните базу, "
+                "например командой seed_data"
+            )
+        server = (
+            nullcontext(options["url"])
+            if options["url"]
+            else local_server(options["server_workers"])
+        )
+        try:
+            with server as base_url:
+                test = LoadTest(
+                    base_url,
+                    workload,
+                    seed=options["seed"],
+                    timeout=options["timeout"],
+                    scenarios=scenarios,
+                    collection_path=options["collection"],
+                )
+                self.stdout.write(
+                    f"{base_url}: {options['concurrency']} виртуальных "
+                    f"пользователей, {options['duration']:g} с"
+                )
+                elapsed = asyncio.run(
+                    test.run(options["concurrency"], options["duration"])
+                )
+        except HTTPError as error:
+            raise CommandError(str(error))
+        self.write_report(summarize(test.stats, elapsed))
+
+    def write_report(self, rows):
+        width = max(len(row["request"]) for row in rows)
+        columns = [f"p{percent}" for percent in PERCENTILES] + ["max"]
+        self.stdout.write(
+            f"{'запрос':<{width}} {'число':>7} {'RPS':>8} "
+            + " ".join(f"{column:>8}" for column in columns)
+            + f" {'ошибки':>7}  статусы"
+        )
+        for row in rows:
+            line = (
+                f"{row['request']:<{width}} {row['count']:>7} "
+                f"{row['rps']:>8.1f} "
+                + " ".join(f"{row[column]:>8.1f}" for column in columns)
+                + f" {row['error_rate']:>7.1%}  "
+                + ", ".join(
+                    f"{status}×{count}"
+                    for status, count in sorted(
+                        row["statuses"].items(), key=str
+                    )
+                )
+            )
+            self.stdout.write(
+                self.style.ERROR(line) if row["error_rate"] else line
+            )
+        self.stdout.write("Задержки в миллисекундах.")
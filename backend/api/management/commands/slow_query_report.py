@@ -0,0 +1,68 @@
+import json
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Сводка по журналу медленных запросов: худшие отпечатки SQL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log", default=settings.SLOW_QUERY_LOG)
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument(
+            "--order-by",
+            choices=("total", "max", "count"),
+            default="total",
+        )
+
+    def read_records(self, log):
+        log = Path(log)
+        for path in sorted(log.parent.glob(f"{log.name}*"), reverse=True):
+            with open(path, encoding="utf-8") as lines:
+                for line in lines:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+    def handle(self, *args, **options):
+        stats = defaultdict(
+            lambda: {"count": 0, "total": 0.0, "max": 0.0, "views": Counter()}
+        )
+        for record in self.read_records(options["log"]):
+            item = stats[record["fingerprint"]]
+            item["sql"] = record["sql"]
+            item["count"] += 1
+            item["total"] += record["duration_ms"]
+            item["max"] = max(item["max"], record["duration_ms"])
+            item["views"][
+                record.get("url_name") or record.get("view") or "-"
+            ] += 1
+            if record.get("stack"):
+                item["stack"] = record["stack"]
+
+        worst = sorted(
+            stats.items(),
+            key=lambda item: item[1][options["order_by"]],
+            reverse=True,
+        )[: options["top"]]
+        for fingerprint, item in worst:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{fingerprint}  count={item['count']} "
+                    f"total={item['total']:.1f}мс "
+                    f"avg={item['total'] / item['count']:.1f}мс "
+                    f"max={item['max']:.1f}мс"
+                )
+            )
+            self.stdout.write(f"  {item['sql']}")
+            views = ", ".join(
+                f"{view} ({count})"
+                for view, count in item["views"].most_common(3)
+            )
+            self.stdout.write(f"  представления: {views}")
+            for frame in item.get("stack", [])[-3:]:
+                self.stdout.write(f"    {frame}")
@@ -0,0 +1,129 @@
+import cProfile
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from rest_framework.permissions import SAFE_METHODS
+
+from .db import is_pool_timeout
+from .db_router import (
+    is_pinned_to_primary,
+    pin_to_primary,
+    reset_replica,
+    use_replica,
+)
+from .profiling import QueryTimer, save_profile, should_profile
+from .query_budget import count_queries, report
+from .slow_queries import reset_current_request, set_current_request
+
+
+class DatabasePoolTimeoutMiddleware:
+    retry_after = 1
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not is_pool_timeout(exception):
+            return None
+        response = JsonResponse(
+            {"detail": "Сервер перегружен, повторите запрос позже."},
+            status=503,
+            json_dumps_params={"ensure_ascii": False},
+        )
+        response["Retry-After"] = str(self.retry_after)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Безопасные запросы к представлениям с read_from_replica = True
+    читают с реплик, кроме клиентов, недавно выполнивших запись."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        token = use_replica(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_replica(token)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and getattr(view_func, "cls", None) is not None
+            and getattr(view_func.cls, "read_from_replica", False)
+            and not is_pinned_to_primary(request)
+        ):
+            use_replica()
+
+
+class ProfilingMiddleware:
+    """cProfile и время SQL для запросов персонала с заголовком
+    PROFILING_HEADER и для каждого PROFILING_SAMPLE_RATE-го запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request):
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+        response["X-Profile-Id"] = save_profile(
+            profiler, timer.queries, request, response, duration
+        )
+        return response
+
+
+class SlowQueryContextMiddleware:
+    """Привязывает текущий запрос к записям журнала медленных запросов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = set_current_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            reset_current_request(token)
+
+
+class QueryBudgetMiddleware:
+    """Проверяет число SQL-запросов по query_budgets представления
+    и ищет повторяющиеся запросы (вероятные N+1)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_BUDGET_ENABLED:
+            return self.get_response(request)
+        with count_queries() as counter:
+            response = self.get_response(request)
+        report(request, counter)
+        return response
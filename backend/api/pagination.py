@@ -1,7 +1,101 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.db.models import BooleanField, F, Func, Value
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class LimitAsPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = "limit"
     max_page_size = 100
+
+
+class RowLessThan(Func):
+    """(a, b) < (c, d) — сравнение строк.
+
+    В отличие от a < c OR (a = c AND b < d) PostgreSQL использует его
+    как границу диапазона в составном индексе и начинает чтение сразу
+    с нужного места, а не с начала индекса.
+    """
+
+    arity = 4
+    output_field = BooleanField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sqls, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            sqls.append(sql)
+            params.extend(expression_params)
+        return f"({sqls[0]}, {sqls[1]}) < ({sqls[2]}, {sqls[3]})", params
+
+
+class CreatedKeysetPagination(BasePagination):
+    """Страницы по ключу (created, id) от новых к старым.
+
+    Вместо OFFSET следующая страница начинается строго после последней
+    записи предыдущей, поэтому любая страница читается по индексу
+    за одно и то же время.
+    """
+
+    page_size = 20
+    page_size_query_param = "limit"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Неверный курсор."
+
+    def get_page_size(self, request):
+        limit = request.query_params.get(self.page_size_query_param, "")
+        if limit.isdigit() and int(limit) > 0:
+            return min(int(limit), self.max_page_size)
+        return self.page_size
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            created, _, pk = (
+                urlsafe_b64decode(cursor.encode()).decode().partition("|")
+            )
+            created = parse_datetime(created)
+            pk = int(pk)
+        except (BinasciiError, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created, pk
+
+    def encode_cursor(self, item):
+        cursor = f"{item.created.isoformat()}|{item.pk}"
+        return urlsafe_b64encode(cursor.encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            created, pk = cursor
+            queryset = queryset.filter(
+                RowLessThan(F("created"), F("pk"), Value(created), Value(pk))
+            )
+        page = list(queryset.order_by("-created", "-pk")[: page_size + 1])
+        self.next_item = page[page_size - 1] if len(page) > page_size else None
+        return page[:page_size]
+
+    def get_next_link(self):
+        if self.next_item is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_item),
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
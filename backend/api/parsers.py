@@ -0,0 +1,28 @@
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework.parsers import FileUploadParser, MultiPartParser
+
+
+class TemporaryFileUploadMixin:
+    """Пишет загружаемый файл во временный файл порциями по 64 КБ,
+    не держа тело запроса в памяти."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context["request"]
+        request.upload_handlers = [
+            TemporaryFileUploadHandler(request._request)
+        ]
+        return super().parse(stream, media_type, parser_context)
+
+
+class StreamingMultiPartParser(TemporaryFileUploadMixin, MultiPartParser):
+    pass
+
+
+class StreamingFileUploadParser(TemporaryFileUploadMixin, FileUploadParser):
+    """Тело запроса целиком является файлом изображения."""
+
+    def get_filename(self, stream, media_type, parser_context):
+        return (
+            super().get_filename(stream, media_type, parser_context)
+            or "upload"
+        )
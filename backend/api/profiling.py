@@ -0,0 +1,115 @@
+import json
+import pstats
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+from django.conf import settings
+from rest_framework.authtoken.models import Token
+
+TOP_FUNCTIONS = 25
+TOP_QUERIES = 15
+
+
+class QueryTimer:
+    """execute_wrapper, запоминающий SQL и время выполнения запросов."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+
+def _is_staff(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    keyword, _, key = request.headers.get("Authorization", "").partition(" ")
+    if keyword != "Token" or not key:
+        return False
+    return Token.objects.filter(key=key, user__is_staff=True).exists()
+
+
+def should_profile(request):
+    if request.headers.get(settings.PROFILING_HEADER) and _is_staff(request):
+        return True
+    rate = settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.randrange(rate) == 0
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": pstats.func_std_string(func),
+            "calls": calls,
+            "total_ms": round(total * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        }
+        for func, (_, calls, total, cumulative, _) in rows[:TOP_FUNCTIONS]
+    ]
+
+
+def save_profile(profiler, queries, request, response, duration):
+    directory = Path(settings.PROFILING_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid4().hex[:8]}"
+    profiler.dump_stats(directory / f"{name}.prof")
+    user = getattr(request, "user", None)
+    summary = {
+        "id": name,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 3),
+        "user_id": user.pk if user is not None else None,
+        "functions": _top_functions(profiler),
+        "queries": {
+            "count": len(queries),
+            "total_ms": round(sum(spent for _, spent in queries) * 1000, 3),
+            "slowest": [
+                {"sql": sql, "ms": round(spent * 1000, 3)}
+                for sql, spent in sorted(
+                    queries, key=lambda query: query[1], reverse=True
+                )[:TOP_QUERIES]
+            ],
+        },
+    }
+    (directory / f"{name}.json").write_text(
+        json.dumps(summary, ensure_ascii=False), encoding="utf-8"
+    )
+    _rotate(directory)
+    return name
+
+
+def _rotate(directory):
+    summaries = sorted(directory.glob("*.json"), reverse=True)
+    for summary in summaries[settings.PROFILING_KEEP:]:
+        summary.unlink(missing_ok=True)
+        summary.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def list_profiles():
+    directory = Path(settings.PROFILING_DIR)
+    if not directory.exists():
+        return []
+    return [
+        json.loads(summary.read_text(encoding="utf-8"))
+        for summary in sorted(directory.glob("*.json"), reverse=True)
+    ]
+
+
+def profile_path(name):
+    path = Path(settings.PROFILING_DIR) / f"{name}.prof"
+    if path.name != f"{name}.prof" or not path.exists():
+        return None
+    return path
@@ -0,0 +1,138 @@
+import logging
+import sys
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.fields import Field
+
+from .slow_queries import app_stack, fingerprint, normalize_sql, request_info
+
+logger = logging.getLogger("foodgram.query_budget")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def serializer_origin():
+    """Поле сериализатора, ближайшее к месту вызова по стеку, например
+    RecipeListSerializer.author: app_stack() его не показывает, если
+    запрос выполняет сам DRF."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        field = frame.f_locals.get("self")
+        # type(), а не isinstance(): isinstance вычислил бы ленивый объект
+        # (request.user) и выполнил запрос внутри счётчика.
+        if issubclass(type(field), Field) and field.field_name:
+            return f"{type(field.parent).__name__}.{field.field_name}"
+        frame = frame.f_back
+    return None
+
+
+class QueryCounter:
+    """execute_wrapper: считает запросы по нормализованному SQL.
+
+    Стек вызова запоминается один раз — когда запрос повторился больше
+    QUERY_REPEAT_THRESHOLD раз, — и указывает на код, выполняющий его
+    в цикле (например, метод сериализатора).
+    """
+
+    def __init__(self, repeat_threshold=None):
+        self.repeat_threshold = (
+            settings.QUERY_REPEAT_THRESHOLD
+            if repeat_threshold is None
+            else repeat_threshold
+        )
+        self.total = 0
+        self.counts = {}
+        self.stacks = {}
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        normalized = normalize_sql(sql)
+        count = self.counts[normalized] = self.counts.get(normalized, 0) + 1
+        if count == self.repeat_threshold + 1:
+            self.origins[normalized] = serializer_origin()
+            self.stacks[normalized] = app_stack()
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        return [
+            {
+                "fingerprint": fingerprint(normalized),
+                "sql": normalized,
+                "count": self.counts[normalized],
+                "serializer_field": self.origins[normalized],
+                "stack": stack,
+            }
+            for normalized, stack in self.stacks.items()
+        ]
+
+
+@contextmanager
+def count_queries(repeat_threshold=None):
+    counter = QueryCounter(repeat_threshold)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+        yield counter
+
+
+def check_queries(counter, budget=None, check_repeated=True):
+    """Список нарушений: превышение бюджета и вероятные N+1."""
+    problems = []
+    if budget is not None and counter.total > budget:
+        problems.append(f"{counter.total} запросов при бюджете {budget}")
+    if check_repeated:
+        for query in counter.repeated():
+            origin = query["serializer_field"]
+            problems.append(
+                f"N+1: {query['count']} раз {query['sql']}\n  "
+                + (f"поле {origin}\n  " if origin else "")
+                + "\n  ".join(query["stack"])
+            )
+    return problems
+
+
+@contextmanager
+def assert_query_budget(budget=None, repeat_threshold=None):
+    """Для тестов: QueryBudgetExceeded, если внутри блока выполнено больше
+    budget запросов или один запрос повторился больше repeat_threshold
+    раз."""
+    with count_queries(repeat_threshold) as counter:
+        yield counter
+    problems = check_queries(counter, budget)
+    if problems:
+        raise QueryBudgetExceeded("\n".join(problems))
+
+
+def _view_class(request):
+    match = request.resolver_match
+    return getattr(match and match.func, "cls", None)
+
+
+def view_budget(request):
+    """Бюджет из query_budgets представления для текущего действия
+    (для APIView — для HTTP-метода в нижнем регистре)."""
+    budgets = getattr(_view_class(request), "query_budgets", None) or {}
+    return budgets.get(
+        request_info(request)["action"] or request.method.lower()
+    )
+
+
+def report(request, counter):
+    """Пишет нарушения в лог, а при QUERY_BUDGET_RAISE (тесты) —
+    выбрасывает QueryBudgetExceeded."""
+    problems = check_queries(
+        counter,
+        view_budget(request),
+        getattr(_view_class(request), "check_repeated_queries", True),
+    )
+    if not problems:
+        return
+    message = f"{request.method} {request.path}\n" + "\n".join(problems)
+    if settings.QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
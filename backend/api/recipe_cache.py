@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from recipes.models import Recipe
+
+from . import fast_serializers
+from .versions import INGREDIENTS_VERSION, bump_version, get_versions
+
+RECIPE_VERSION = "recipe-cache:recipe:{}"
+AUTHOR_VERSION = "recipe-cache:author:{}"
+FRAGMENT = "recipe-cache:fragment:{}:{}:{}:{}"
+
+# Сохранение этих полей не меняет данные автора в карточке рецепта.
+_IGNORED_USER_FIELDS = frozenset({"last_login", "password"})
+
+
+def recipe_rows(queryset):
+    return queryset.values_list("pk", "author_id")
+
+
+def _fragment_keys(rows):
+    version_keys = [INGREDIENTS_VERSION]
+    for recipe_id, author_id in rows:
+        version_keys += [
+            RECIPE_VERSION.format(recipe_id),
+            AUTHOR_VERSION.format(author_id),
+        ]
+    versions = get_versions(version_keys)
+    return {
+        recipe_id: FRAGMENT.format(
+            recipe_id,
+            versions[RECIPE_VERSION.format(recipe_id)],
+            versions[AUTHOR_VERSION.format(author_id)],
+            versions[INGREDIENTS_VERSION],
+        )
+        for recipe_id, author_id in rows
+    }
+
+
+def recipe_fragments(rows):
+    """Общие части рецептов из кэша; промахи собираются одним проходом
+    fast_serializers.recipe_fragments и сохраняются в кэш."""
+    keys = _fragment_keys(rows)
+    cached = cache.get_many(keys.values())
+    fragments = {
+        recipe_id: cached[key]
+        for recipe_id, key in keys.items()
+        if key in cached
+    }
+    missing = keys.keys() - fragments.keys()
+    if missing:
+        # Версии прочитаны до данных, поэтому фрагмент не может оказаться
+        # старее своего ключа. Чтение с реплики это бы нарушило.
+        rendered = fast_serializers.recipe_fragments(
+            fast_serializers.recipe_rows(
+                Recipe.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=missing)
+            )
+        )
+        cache.set_many(
+            {keys[fragment["id"]]: fragment for fragment in rendered},
+            timeout=settings.RECIPE_CACHE_TIMEOUT,
+        )
+        fragments.update(
+            (fragment["id"], fragment) for fragment in rendered
+        )
+    return [
+        fragments[recipe_id]
+        for recipe_id, _ in rows
+        if recipe_id in fragments
+    ]
+
+
+def render_recipes(rows, request):
+    """То же, что fast_serializers.render_recipes, но для строк
+    recipe_rows() и с общей частью из кэша."""
+    return fast_serializers.overlay_recipes(
+        recipe_fragments(list(rows)), request
+    )
+
+
+def recipe_changed(sender, instance, **kwargs):
+    bump_version(RECIPE_VERSION.format(instance.pk))
+
+
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    bump_version(RECIPE_VERSION.format(instance.recipe_id))
+
+
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and _IGNORED_USER_FIELDS.issuperset(update_fields):
+        return
+    bump_version(AUTHOR_VERSION.format(instance.pk))
@@ -0,0 +1,70 @@
+from threading import Lock
+
+from recipes.models import Favorite, ShoppingCart, Subscription
+
+SUBSCRIBED = "subscribed"
+FAVORITED = "favorited"
+IN_SHOPPING_CART = "in_shopping_cart"
+
+_LOADERS = {
+    SUBSCRIBED: lambda user, ids: Subscription.objects.filter(
+        subscriber=user, author_id__in=ids
+    ).values_list("author_id", flat=True),
+    FAVORITED: lambda user, ids: Favorite.objects.filter(
+        user=user, recipe_id__in=ids
+    ).values_list("recipe_id", flat=True),
+    IN_SHOPPING_CART: lambda user, ids: ShoppingCart.objects.filter(
+        user=user, recipe_id__in=ids
+    ).values_list("recipe_id", flat=True),
+}
+
+
+class UserRelations:
+    """Подписки, избранное и корзина текущего пользователя в виде множеств
+    id на время запроса.
+
+    Связи подгружаются одним запросом на всю страницу объектов и только для
+    ещё не проверенных id; дальше ответ — проверка вхождения в множество.
+    """
+
+    def __init__(self, user):
+        self.user = user if user.is_authenticated else None
+        self._checked = {relation: set() for relation in _LOADERS}
+        self._related = {relation: set() for relation in _LOADERS}
+        self._lock = Lock()
+
+    def _load(self, relation, ids):
+        with self._lock:
+            ids = set(ids) - self._checked[relation]
+            if ids:
+                self._related[relation].update(
+                    _LOADERS[relation](self.user, ids)
+                )
+                self._checked[relation].update(ids)
+
+    def related(self, relation, ids):
+        if self.user is None:
+            return set()
+        self._load(relation, ids)
+        # Под блокировкой: вложенные запросы /api/batch/ могут
+        # дополнять множество из других потоков.
+        with self._lock:
+            return self._related[relation].intersection(ids)
+
+    def contains(self, relation, object_id, page_ids=tuple):
+        if self.user is None:
+            return False
+        if object_id not in self._checked[relation]:
+            self._load(relation, {object_id, *page_ids()})
+        return object_id in self._related[relation]
+
+
+def get_relations(request):
+    http_request = getattr(request, "_request", request)
+    relations = getattr(http_request, "_user_relations", None)
+    if relations is None or relations.user != (
+        request.user if request.user.is_authenticated else None
+    ):
+        relations = UserRelations(request.user)
+        http_request._user_relations = relations
+    return relations
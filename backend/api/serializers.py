@@ -1,13 +1,36 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
+from django.db import transaction
+from django.db.models import Count, Prefetch, prefetch_related_objects
 from djoser.serializers import UserSerializer
 from drf_extra_fields.fields import Base64ImageField
-from recipes.models import Ingredient, Recipe, RecipeIngredient, Subscription
+from PIL import Image, UnidentifiedImageError
+from recipes.models import Ingredient, Recipe, RecipeIngredient
 from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+
+from .batch import ASYNC_ERROR, is_async_view
+from .relations import (
+    FAVORITED,
+    IN_SHOPPING_CART,
+    SUBSCRIBED,
+    get_relations,
+)
 
 User = get_user_model()
 
 
+def page_objects(serializer):
+    """Все объекты корневого сериализатора: страница списка или один."""
+    root = serializer.root
+    if root.instance is None:
+        return []
+    if isinstance(root, serializers.ListSerializer):
+        return root.instance
+    return [root.instance]
+
+
 class UserProfileSerializer(UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
     avatar = Base64ImageField(required=False, read_only=True)
@@ -24,10 +47,25 @@ class UserProfileSerializer(UserSerializer):
             request
             and request.user.is_authenticated
             and request.user != obj
-            and Subscription.objects.filter(
-                subscriber=request.user,
-                author=obj,
-            ).exists()
+            and get_relations(request).contains(
+                SUBSCRIBED,
+                obj.pk,
+                lambda: (
+                    getattr(item, "author_id", item.pk)
+                    for item in page_objects(self)
+                ),
+            )
+        )
+
+
+class FollowerSerializer(UserProfileSerializer):
+    is_mutual = serializers.BooleanField(read_only=True)
+    followed_at = serializers.DateTimeField(read_only=True)
+
+    class Meta(UserProfileSerializer.Meta):
+        fields = UserProfileSerializer.Meta.fields + (
+            "is_mutual",
+            "followed_at",
         )
 
 
@@ -38,12 +76,44 @@ class UserAvatarSerializer(serializers.ModelSerializer):
         model = User
         fields = ("avatar",)
 
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # Блокировка имени файла (recipes/storage.py) держится до записи
+        # ссылки на него.
+        return super().update(instance, validated_data)
+
+
+class ImageUploadSerializer(serializers.Serializer):
+    ALLOWED_FORMATS = ("JPEG", "PNG", "GIF", "WEBP")
+    MAX_SIDE = 4096
+
+    image = serializers.FileField(allow_empty_file=False)
+
+    def validate_image(self, upload):
+        # Image.open читает только заголовок, без декодирования пикселей.
+        try:
+            with Image.open(upload) as image:
+                image_format, (width, height) = image.format, image.size
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+            raise serializers.ValidationError(
+                "Загрузите корректное изображение."
+            )
+        if image_format not in self.ALLOWED_FORMATS:
+            raise serializers.ValidationError(
+                f"Формат {image_format} не поддерживается."
+            )
+        if width > self.MAX_SIDE or height > self.MAX_SIDE:
+            raise serializers.ValidationError(
+                f"Изображение больше {self.MAX_SIDE}x{self.MAX_SIDE}."
+            )
+        upload.seek(0)
+        upload.name = f"upload.{image_format.lower()}"
+        return upload
+
 
 class UserWithRecipesSerializer(UserProfileSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source="recipes.count", read_only=True
-    )
+    recipes_count = serializers.SerializerMethodField()
 
     class Meta(UserProfileSerializer.Meta):
         model = User
@@ -52,13 +122,43 @@ class UserWithRecipesSerializer(UserProfileSerializer):
             "recipes_count",
         )
 
+    def _load_page_recipes(self):
+        # Рецепты и их число сразу для всех авторов страницы: два запроса
+        # вместо двух на каждого автора.
+        if getattr(self, "_page_recipes_loaded", False):
+            return
+        authors = page_objects(self)
+        limit = self.context["request"].query_params.get("recipes_limit", "0")
+        if limit == "0":
+            for author in authors:
+                author.page_recipes = []
+        else:
+            recipes = Recipe.objects.all()
+            if limit.isdigit():
+                recipes = recipes[: int(limit)]
+            prefetch_related_objects(
+                authors,
+                Prefetch("recipes", queryset=recipes, to_attr="page_recipes"),
+            )
+        counts = dict(
+            Recipe.objects.filter(author__in=authors)
+            .order_by()
+            .values_list("author")
+            .annotate(Count("pk"))
+        )
+        for author in authors:
+            author.page_recipes_count = counts.get(author.pk, 0)
+        self._page_recipes_loaded = True
+
     def get_recipes(self, user):
-        request = self.context.get("request")
-        limit = request.query_params.get("recipes_limit", "0")
-        qs = user.recipes.all()
-        if limit.isdigit():
-            qs = qs[: int(limit)]
-        return RecipeSerializer(qs, many=True, context=self.context).data
+        self._load_page_recipes()
+        return RecipeSerializer(
+            user.page_recipes, many=True, context=self.context
+        ).data
+
+    def get_recipes_count(self, user):
+        self._load_page_recipes()
+        return user.page_recipes_count
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -75,10 +175,9 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 
 class IngredientInRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source="ingredient",
-    )
+    # Существование ингредиентов проверяет RecipeWriteSerializer одним
+    # запросом на весь список.
+    id = serializers.IntegerField(source="ingredient_id")
     name = serializers.CharField(source="ingredient.name", read_only=True)
     measurement_unit = serializers.CharField(
         source="ingredient.measurement_unit", read_only=True
@@ -113,7 +212,23 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
     def validate_ingredients(self, value):
         if not value:
             raise serializers.ValidationError("Ингредиенты обязательны.")
-        ingredients = [item["ingredient"] for item in value]
+        ingredients = [item["ingredient_id"] for item in value]
+        existing = set(
+            Ingredient.objects.filter(pk__in=ingredients).values_list(
+                "pk", flat=True
+            )
+        )
+        if not existing.issuperset(ingredients):
+            does_not_exist = PrimaryKeyRelatedField.default_error_messages[
+                "does_not_exist"
+            ]
+            raise serializers.ValidationError(
+                {
+                    str(index): {"id": [does_not_exist.format(pk_value=pk)]}
+                    for index, pk in enumerate(ingredients)
+                    if pk not in existing
+                }
+            )
         if len(ingredients) != len(set(ingredients)):
             raise serializers.ValidationError(
                 "Ингредиенты не должны повторяться."
@@ -136,19 +251,21 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         objs = [
             RecipeIngredient(
                 recipe=recipe,
-                ingredient=item["ingredient"],
+                ingredient_id=item["ingredient_id"],
                 amount=item["amount"],
             )
             for item in ingredients_data
         ]
         RecipeIngredient.objects.bulk_create(objs)
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         recipe = super().create(validated_data)
         self._save_ingredients(recipe, ingredients_data)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop("ingredients")
         super().update(instance, validated_data)
@@ -157,6 +274,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         return instance
 
     def to_representation(self, instance):
+        prefetch_related_objects([instance], "recipe_ingredients__ingredient")
         return RecipeListSerializer(instance, context=self.context).data
 
 
@@ -183,16 +301,44 @@ class RecipeListSerializer(serializers.ModelSerializer):
         )
         read_only_fields = fields
 
-    def get_is_favorited(self, obj):
-        user = self.context.get("request").user
-        return (
-            user.is_authenticated
-            and obj.favorite_set.filter(user=user).exists()
+    def _has_relation(self, relation, obj):
+        request = self.context.get("request")
+        return request.user.is_authenticated and get_relations(
+            request
+        ).contains(
+            relation,
+            obj.pk,
+            lambda: (recipe.pk for recipe in page_objects(self)),
         )
 
+    def get_is_favorited(self, obj):
+        return self._has_relation(FAVORITED, obj)
+
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get("request").user
-        return (
-            user.is_authenticated
-            and obj.shoppingcart_set.filter(user=user).exists()
-        )
+        return self._has_relation(IN_SHOPPING_CART, obj)
+
+
+class BatchItemSerializer(serializers.Serializer):
+    id = serializers.CharField(required=False, max_length=64)
+    path = serializers.CharField(max_length=2048)
+
+    def validate_path(self, path):
+        if not path.startswith("/api/") or path.startswith("/api/batch/"):
+            raise serializers.ValidationError(
+                "Допустимы пути /api/, кроме самого /api/batch/."
+            )
+        if is_async_view(path):
+            raise serializers.ValidationError(ASYNC_ERROR)
+        return path
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(default=False)
+
+    def validate_requests(self, items):
+        if len(items) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"Не больше {settings.BATCH_MAX_REQUESTS} запросов в пакете."
+            )
+        return items
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import traceback
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.utils.functional import empty
+
+logger = logging.getLogger("foodgram.slow_queries")
+
+_current_request = ContextVar("slow_query_request", default=None)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\?")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def normalize_sql(sql):
+    sql = _WHITESPACE_RE.sub(" ", sql).strip()
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    return _LIST_RE.sub("(...)", sql)
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:16]
+
+
+_SKIPPED_FILES = (
+    "manage.py",
+    "api/middleware.py",
+    "api/query_budget.py",
+    "api/slow_queries.py",
+)
+
+
+def app_stack(limit=None):
+    """Кадры стека из кода проекта, без Django и сторонних пакетов."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        f"{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}"
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and "site-packages" not in frame.filename
+        and not frame.filename.endswith(_SKIPPED_FILES)
+    ]
+    return frames[-(limit or settings.SLOW_QUERY_STACK_DEPTH):]
+
+
+def set_current_request(request):
+    return _current_request.set(request)
+
+
+def reset_current_request(token):
+    _current_request.reset(token)
+
+
+def request_info(request):
+    if request is None:
+        return {"url_name": None, "view": None, "action": None, "user": None}
+    match = request.resolver_match
+    view = action = None
+    if match is not None:
+        view_class = getattr(match.func, "cls", None)
+        view = (view_class or match.func).__name__
+        action = getattr(match.func, "actions", {}).get(
+            request.method.lower()
+        )
+    user = getattr(request, "user", None)
+    # Ещё не вычисленный request.user не трогаем: загрузка сессии — тоже
+    # SQL-запрос, и журнал вызвал бы сам себя.
+    if getattr(user, "_wrapped", None) is empty:
+        user = None
+    if user is None or not user.is_authenticated:
+        user = None
+    return {
+        "url_name": match.view_name if match is not None else None,
+        "view": view,
+        "action": action,
+        "user": user and user.pk,
+    }
+
+
+class SlowQueryRecorder:
+    """execute_wrapper: пишет в лог запросы дольше SLOW_QUERY_THRESHOLD_MS."""
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+                self.record(sql, duration_ms, context["connection"].alias)
+
+    def record(self, sql, duration_ms, alias):
+        normalized = normalize_sql(sql)
+        logger.warning(
+            "slow query",
+            extra={
+                "slow_query": {
+                    "fingerprint": fingerprint(normalized),
+                    "sql": normalized,
+                    "duration_ms": round(duration_ms, 3),
+                    "database": alias,
+                    **request_info(_current_request.get()),
+                    "stack": app_stack(),
+                }
+            },
+        )
+
+
+recorder = SlowQueryRecorder()
+
+
+def install_recorder(sender, connection, **kwargs):
+    if recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(recorder)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(
+            {
+                "time": datetime.fromtimestamp(
+                    record.created, timezone.utc
+                ).isoformat(),
+                "message": record.getMessage(),
+                **getattr(record, "slow_query", {}),
+            },
+            ensure_ascii=False,
+        )
+
+
+class SlowQueryFileHandler(RotatingFileHandler):
+    """Каталог журнала создаётся при первой записи, а не при загрузке
+    настроек, — иначе приложение не запустилось бы на файловой системе
+    только для чтения."""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
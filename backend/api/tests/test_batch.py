@@ -0,0 +1,154 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from recipes.models import Favorite, Ingredient, Recipe, User
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from api.batch import ASYNC_ERROR, run_sub_request
+from api.views import IngredientViewSet
+
+
+class BatchTests(TestCase):
+    url = "/api/batch/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="reader@example.com",
+            username="reader",
+            first_name="Читатель",
+            last_name="Тестов",
+            password="password",
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.recipe = Recipe.objects.create(
+            author=cls.user,
+            name="Рецепт",
+            text="Описание",
+            image="recipes/images/recipe.png",
+            cooking_time=10,
+        )
+        Favorite.objects.create(user=cls.user, recipe=cls.recipe)
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit="г")
+            for name in ("соль", "мука", "сахар")
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def batch(self, paths, status=200, parallel=False):
+        response = self.client.post(
+            self.url,
+            {
+                "requests": [
+                    {"id": str(index), "path": path}
+                    for index, path in enumerate(paths)
+                ],
+                "parallel": parallel,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def statuses(self, data):
+        return [item["status"] for item in data["responses"]]
+
+    def test_shared_authentication(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        data = self.batch(
+            [
+                "/api/users/me/",
+                f"/api/recipes/{self.recipe.pk}/",
+                "/api/recipes/?is_favorited=1",
+            ]
+        )
+        self.assertEqual(self.statuses(data), [200, 200, 200])
+        me, recipe, favorites = (item["body"] for item in data["responses"])
+        self.assertEqual(me["id"], self.user.pk)
+        self.assertTrue(recipe["is_favorited"])
+        self.assertEqual(
+            [item["id"] for item in favorites["results"]], [self.recipe.pk]
+        )
+
+    def test_anonymous(self):
+        data = self.batch(["/api/users/me/", "/api/recipes/"])
+        self.assertEqual(self.statuses(data), [401, 200])
+
+    def test_not_found_items(self):
+        data = self.batch(
+            ["/api/unknown/", "/api/recipes/0/", "/api/ingredients/"]
+        )
+        self.assertEqual(self.statuses(data), [404, 404, 200])
+        self.assertEqual(
+            [item["id"] for item in data["responses"]], ["0", "1", "2"]
+        )
+
+    def test_invalid_paths(self):
+        for path in ("/admin/", "/api/batch/", "/api/events/"):
+            with self.subTest(path):
+                self.batch([path], status=400)
+
+    def test_async_view_item(self):
+        request = mock.Mock(META={}, scheme="http")
+        request.user.is_authenticated = False
+        self.assertEqual(
+            run_sub_request(request, {"path": "/api/events/"}),
+            {
+                "id": None,
+                "path": "/api/events/",
+                "status": 400,
+                "body": {"detail": ASYNC_ERROR},
+            },
+        )
+
+    def test_failed_item_is_isolated(self):
+        with mock.patch.object(
+            IngredientViewSet, "retrieve", side_effect=RuntimeError
+        ), self.assertLogs("foodgram.batch", "ERROR"):
+            data = self.batch(
+                [
+                    f"/api/ingredients/{self.ingredients[0].pk}/",
+                    "/api/recipes/",
+                ]
+            )
+        self.assertEqual(self.statuses(data), [500, 200])
+
+    @override_settings(BATCH_MAX_WORKERS=4)
+    def test_parallel_keeps_order(self):
+        threads = set()
+        # Первые запросы заканчиваются последними.
+        delays = {
+            ingredient.pk: 0.02 * (len(self.ingredients) - index)
+            for index, ingredient in enumerate(self.ingredients)
+        }
+
+        def retrieve(view, request, pk):
+            threads.add(threading.get_ident())
+            time.sleep(delays[int(pk)])
+            return Response({"pk": int(pk)})
+
+        paths = [
+            f"/api/ingredients/{ingredient.pk}/"
+            for ingredient in self.ingredients
+        ] * 2
+        with mock.patch.object(IngredientViewSet, "retrieve", retrieve):
+            data = self.batch(paths, parallel=True)
+        self.assertEqual(
+            [item["body"]["pk"] for item in data["responses"]],
+            [int(path.split("/")[3]) for path in paths],
+        )
+        self.assertEqual(
+            [item["id"] for item in data["responses"]],
+            [str(index) for index in range(len(paths))],
+        )
+        self.assertGreater(len(threads), 1)
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_too_many_requests(self):
+        self.batch(["/api/recipes/"] * 3, status=400)
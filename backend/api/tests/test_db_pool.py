@@ -0,0 +1,39 @@
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase
+from psycopg_pool import PoolTimeout
+
+from api.views import IngredientViewSet
+
+
+class DatabasePoolTimeoutTests(TestCase):
+    url = "/api/ingredients/1/"
+
+    def get(self, error):
+        with mock.patch.object(
+            IngredientViewSet, "get_queryset", side_effect=error
+        ):
+            return self.client.get(self.url)
+
+    def assert_overloaded(self, response):
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertIn("detail", response.json())
+
+    def test_pool_timeout(self):
+        self.assert_overloaded(
+            self.get(PoolTimeout("couldn't get a connection after 10 sec"))
+        )
+
+    def test_wrapped_pool_timeout(self):
+        # Django оборачивает ошибки драйвера в свои исключения.
+        error = OperationalError("couldn't get a connection")
+        error.__cause__ = PoolTimeout("couldn't get a connection")
+        self.assert_overloaded(self.get(error))
+
+    def test_other_database_errors_are_not_masked(self):
+        self.client.raise_request_exception = False
+        response = self.get(OperationalError("server closed the connection"))
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn("Retry-After", response)
@@ -0,0 +1,109 @@
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from recipes.models import Ingredient, Recipe, User
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.db_router import ReplicaRouter, reset_replica, use_replica
+
+REPLICA = "replica_0"
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TestCase):
+    """Реплика — отдельная база SQLite с другими данными, поэтому по
+    ответу видно, откуда шло чтение."""
+
+    @classmethod
+    def setUpClass(cls):
+        descriptor, cls.replica_name = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(descriptor)
+        connections.settings[REPLICA] = connections.configure_settings(
+            {
+                "default": connections["default"].settings_dict,
+                REPLICA: {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": cls.replica_name,
+                },
+            }
+        )[REPLICA]
+        # Роутер не разрешает миграции реплик.
+        with override_settings(DATABASE_REPLICAS=[]):
+            call_command("migrate", database=REPLICA, verbosity=0)
+        # Псевдоним появился после сборки тестов, поэтому добавляется
+        # здесь, а не в атрибуте класса.
+        cls.databases = {"default", REPLICA}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        os.unlink(cls.replica_name)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="reader@example.com",
+            username="reader",
+            first_name="Читатель",
+            last_name="Тестов",
+            password="password",
+        )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.recipe = Recipe.objects.create(
+            author=cls.user,
+            name="Рецепт",
+            text="Описание",
+            image="recipes/images/recipe.png",
+            cooking_time=10,
+        )
+        Ingredient.objects.create(name="соль", measurement_unit="г")
+        Ingredient.objects.using(REPLICA).create(
+            name="соль морская", measurement_unit="г"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def ingredient_names(self):
+        response = self.client.get("/api/ingredients/?name=соль")
+        self.assertEqual(response.status_code, 200)
+        return [ingredient["name"] for ingredient in response.json()]
+
+    def test_safe_request_reads_from_replica(self):
+        self.assertEqual(self.ingredient_names(), ["соль морская"])
+
+    def test_primary_after_write(self):
+        response = self.client.post(
+            f"/api/recipes/{self.recipe.pk}/favorite/"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.ingredient_names(), ["соль"])
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.post("/api/recipes/0/favorite/")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.ingredient_names(), ["соль морская"])
+
+    def test_router(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Ingredient), "default")
+        token = use_replica()
+        try:
+            self.assertEqual(router.db_for_read(Ingredient), REPLICA)
+            self.assertEqual(router.db_for_read(Token), "default")
+            self.assertEqual(router.db_for_write(Ingredient), "default")
+        finally:
+            reset_replica(token)
+        self.assertFalse(router.allow_migrate(REPLICA, "recipes"))
+        self.assertTrue(router.allow_migrate("default", "recipes"))
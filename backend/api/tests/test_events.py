@@ -0,0 +1,148 @@
+import asyncio
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from recipes.models import User
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import events
+from api.events import (
+    Broker,
+    author_channel,
+    issue_ticket,
+    stream_events,
+    user_channel,
+)
+
+
+class FakeBackend:
+    def publish(self, message):
+        pass
+
+    async def listen(self, dispatch):
+        await asyncio.Event().wait()
+
+
+def message(channel, event="recipe", data=None):
+    return {"channel": channel, "event": event, "data": data or {}}
+
+
+class BrokerTests(SimpleTestCase):
+    def test_dispatch_to_subscribed_queues(self):
+        broker = Broker(FakeBackend())
+        first, second = asyncio.Queue(), asyncio.Queue()
+        broker.subscribe(first, "a", "b")
+        broker.subscribe(second, "b")
+        broker.dispatch(message("a"))
+        broker.dispatch(message("b"))
+        broker.dispatch(message("c"))
+        self.assertEqual(first.qsize(), 2)
+        self.assertEqual(second.qsize(), 1)
+
+    def test_unsubscribe_drops_empty_channels(self):
+        broker = Broker(FakeBackend())
+        first, second = asyncio.Queue(), asyncio.Queue()
+        broker.subscribe(first, "a", "b")
+        broker.subscribe(second, "b")
+        broker.unsubscribe(first, "a", "b", "unknown")
+        self.assertEqual(dict(broker.queues), {"b": {second}})
+        broker.unsubscribe(second, "b")
+        self.assertEqual(dict(broker.queues), {})
+
+    def test_full_queue_does_not_block_others(self):
+        broker = Broker(FakeBackend())
+        full, free = asyncio.Queue(maxsize=1), asyncio.Queue()
+        broker.subscribe(full, "a")
+        broker.subscribe(free, "a")
+        broker.dispatch(message("a"))
+        broker.dispatch(message("a"))
+        self.assertEqual(full.qsize(), 1)
+        self.assertEqual(free.qsize(), 2)
+
+
+class StreamEventsTests(SimpleTestCase):
+    async def test_subscription_changes_channels(self):
+        broker = Broker(FakeBackend())
+        with mock.patch.object(events, "broker", broker):
+            stream = stream_events(1, [2])
+            self.assertTrue((await anext(stream)).startswith("retry:"))
+            self.assertEqual(
+                set(broker.queues), {user_channel(1), author_channel(2)}
+            )
+            broker.dispatch(
+                message(
+                    user_channel(1),
+                    "subscription",
+                    {"author": 3, "action": "added"},
+                )
+            )
+            self.assertIn("event: subscription", await anext(stream))
+            self.assertIn(author_channel(3), broker.queues)
+            broker.dispatch(
+                message(
+                    user_channel(1),
+                    "subscription",
+                    {"author": 2, "action": "removed"},
+                )
+            )
+            await anext(stream)
+            self.assertEqual(
+                set(broker.queues), {user_channel(1), author_channel(3)}
+            )
+            await stream.aclose()
+            self.assertEqual(dict(broker.queues), {})
+            broker._listener.cancel()
+
+
+class EventStreamAuthTests(TestCase):
+    url = "/api/events/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="reader@example.com",
+            username="reader",
+            first_name="Читатель",
+            last_name="Тестов",
+            password="password",
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def assert_status(self, status, url=None, **headers):
+        response = self.client.get(url or self.url, **headers)
+        response.close()
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def test_unauthenticated(self):
+        self.assert_status(401)
+        self.assert_status(401, HTTP_AUTHORIZATION="Token wrong")
+        self.assert_status(401, f"{self.url}?ticket=forged")
+
+    def test_token_in_url_is_not_accepted(self):
+        self.assert_status(401, f"{self.url}?token={self.token.key}")
+
+    def test_token_header(self):
+        response = self.assert_status(
+            200, HTTP_AUTHORIZATION=f"Token {self.token.key}"
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+    def test_ticket(self):
+        client = APIClient()
+        self.assertEqual(client.post("/api/events/ticket/").status_code, 401)
+        client.force_authenticate(self.user)
+        ticket = client.post("/api/events/ticket/").json()["ticket"]
+        self.assertNotIn(self.token.key, ticket)
+        self.assert_status(200, f"{self.url}?ticket={ticket}")
+
+    def test_expired_ticket(self):
+        ticket = issue_ticket(self.user)
+        with override_settings(EVENTS_TICKET_MAX_AGE=-1):
+            self.assert_status(401, f"{self.url}?ticket={ticket}")
+
+    def test_inactive_user(self):
+        ticket = issue_ticket(self.user)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assert_status(401, f"{self.url}?ticket={ticket}")
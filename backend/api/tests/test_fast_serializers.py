@@ -0,0 +1,93 @@
+from django.test import TestCase, override_settings
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscription,
+    User,
+)
+from rest_framework.test import APIClient
+
+
+@override_settings(RECIPE_CACHE=False)
+class FastListSerializationTests(TestCase):
+    """Быстрый путь на .values_list() отдаёт то же, что ModelSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.author, cls.other = (
+            User.objects.create_user(
+                email=f"{username}@example.com",
+                username=username,
+                first_name=username.title(),
+                last_name="Тестов",
+                password="password",
+                avatar=avatar,
+            )
+            for username, avatar in (
+                ("reader", None),
+                ("author", "avatars/author.png"),
+                ("other", ""),
+            )
+        )
+        salt, flour, milk = (
+            Ingredient.objects.create(name=name, measurement_unit=unit)
+            for name, unit in (("соль", "г"), ("мука", "г"), ("молоко", "мл"))
+        )
+        recipes = [
+            Recipe.objects.create(
+                author=author,
+                name=f"Рецепт {index}",
+                text=f"Описание {index}",
+                image=f"recipes/images/{index}.png",
+                cooking_time=index + 1,
+            )
+            for index, author in enumerate(
+                (cls.author, cls.author, cls.other, cls.reader)
+            )
+        ]
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+            for recipe, ingredient, amount in (
+                (recipes[0], salt, 5),
+                (recipes[0], flour, 200),
+                (recipes[0], milk, 300),
+                (recipes[1], milk, 100),
+                (recipes[2], flour, 50),
+            )
+        )
+        Subscription.objects.create(subscriber=cls.reader, author=cls.author)
+        Favorite.objects.create(user=cls.reader, recipe=recipes[0])
+        Favorite.objects.create(user=cls.reader, recipe=recipes[2])
+        ShoppingCart.objects.create(user=cls.reader, recipe=recipes[1])
+        Favorite.objects.create(user=cls.other, recipe=recipes[1])
+
+    def fetch(self, url, user, fast):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        with override_settings(FAST_LIST_SERIALIZATION=fast):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assert_same(self, url):
+        for user in (None, self.reader, self.other):
+            with self.subTest(url=url, user=user):
+                self.assertEqual(
+                    self.fetch(url, user, fast=True),
+                    self.fetch(url, user, fast=False),
+                )
+
+    def test_recipes(self):
+        self.assert_same("/api/recipes/")
+        self.assert_same("/api/recipes/?limit=2&page=2")
+        self.assert_same(f"/api/recipes/?author={self.author.pk}")
+
+    def test_users(self):
+        self.assert_same("/api/users/")
+        self.assert_same("/api/users/?limit=1&page=2")
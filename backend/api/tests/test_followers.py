@@ -0,0 +1,148 @@
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase
+from django.utils import timezone
+from recipes.models import Subscription, User
+
+
+def user(name):
+    return User(
+        email=f"{name}@example.com",
+        username=name,
+        first_name=name,
+        last_name=name,
+    )
+
+
+class FollowersPaginationTests(TestCase):
+    followers_count = 105
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com",
+            username="author",
+            first_name="Автор",
+            last_name="Тестов",
+            password="password",
+        )
+        cls.followers = User.objects.bulk_create(
+            user(f"follower{index}") for index in range(cls.followers_count)
+        )
+        Subscription.objects.bulk_create(
+            Subscription(subscriber=follower, author=cls.author)
+            for follower in cls.followers
+        )
+        # Как после миграции 0008: у всех подписок одно и то же время.
+        cls.backfilled = timezone.now() - timedelta(days=30)
+        Subscription.objects.update(created=cls.backfilled)
+        cls.url = f"/api/users/{cls.author.pk}/followers/"
+
+    def get(self, url=None, status=200, **params):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def collect(self, limit):
+        ids, pages, url = [], 0, None
+        params = {"limit": limit}
+        while True:
+            data = self.get(url, **params)
+            ids += [follower["id"] for follower in data["results"]]
+            pages += 1
+            if data["next"] is None:
+                return ids, pages
+            url, params = data["next"], {}
+
+    def test_equal_timestamps(self):
+        ids, pages = self.collect(limit=10)
+        self.assertEqual(pages, 11)
+        self.assertEqual(len(ids), len(set(ids)))
+        expected = sorted(
+            (follower.pk for follower in self.followers), reverse=True
+        )
+        self.assertEqual(ids, expected)
+
+    def test_newer_first(self):
+        newest, newer = self.followers[0], self.followers[1]
+        Subscription.objects.filter(subscriber=newest).update(
+            created=self.backfilled + timedelta(days=2)
+        )
+        Subscription.objects.filter(subscriber=newer).update(
+            created=self.backfilled + timedelta(days=1)
+        )
+        ids, _ = self.collect(limit=7)
+        self.assertEqual(ids[:2], [newest.pk, newer.pk])
+        self.assertEqual(len(set(ids)), self.followers_count)
+
+    def test_cursor_survives_new_followers(self):
+        first = self.get(limit=5)
+        late = User.objects.create_user(
+            email="late@example.com",
+            username="late",
+            first_name="late",
+            last_name="late",
+            password="password",
+        )
+        Subscription.objects.create(subscriber=late, author=self.author)
+        second = self.get(first["next"])
+        ids = [follower["id"] for follower in first["results"]]
+        ids += [follower["id"] for follower in second["results"]]
+        self.assertNotIn(late.pk, ids)
+        self.assertEqual(len(set(ids)), 10)
+
+    def test_malformed_cursor(self):
+        for cursor in (
+            "!!!",
+            "bm90IGJhc2U2NA",
+            urlsafe_b64encode(b"\xff\xfe").decode(),
+            urlsafe_b64encode(b"garbage").decode(),
+            urlsafe_b64encode(b"not-a-date|1").decode(),
+            urlsafe_b64encode(b"2026-01-01T00:00:00+00:00|x").decode(),
+        ):
+            with self.subTest(cursor):
+                self.get(status=404, cursor=cursor)
+
+    def test_limit(self):
+        for limit, size in (
+            ("", 20),
+            ("0", 20),
+            ("-1", 20),
+            ("abc", 20),
+            ("3", 3),
+            ("1000", 100),
+        ):
+            with self.subTest(limit):
+                self.assertEqual(len(self.get(limit=limit)["results"]), size)
+
+    def test_next_keeps_limit(self):
+        data = self.get(limit=3)
+        query = parse_qs(urlparse(data["next"]).query)
+        self.assertEqual(query["limit"], ["3"])
+
+    def test_is_mutual(self):
+        mutual = {follower.pk for follower in self.followers[:3]}
+        Subscription.objects.bulk_create(
+            Subscription(subscriber=self.author, author_id=follower_id)
+            for follower_id in mutual
+        )
+        first = self.get(limit=100)
+        data = first["results"] + self.get(first["next"])["results"]
+        self.assertEqual(
+            {follower["id"] for follower in data if follower["is_mutual"]},
+            mutual,
+        )
+        self.assertTrue(all("followed_at" in follower for follower in data))
+
+    def test_deleted_followers_hidden(self):
+        User.all_objects.filter(pk=self.followers[-1].pk).update(
+            deleted_at=timezone.now()
+        )
+        ids, _ = self.collect(limit=100)
+        self.assertNotIn(self.followers[-1].pk, ids)
+        self.assertEqual(len(ids), self.followers_count - 1)
+
+    def test_unknown_author(self):
+        self.get("/api/users/0/followers/", status=404)
@@ -0,0 +1,69 @@
+from django.test import TestCase
+from recipes.models import Ingredient
+
+
+class IngredientChangesTests(TestCase):
+    url = "/api/ingredients/changes/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.salt, cls.flour, cls.milk = (
+            Ingredient.objects.create(name=name, measurement_unit=unit)
+            for name, unit in (("соль", "г"), ("мука", "г"), ("молоко", "мл"))
+        )
+
+    def changes(self, since):
+        response = self.client.get(self.url, {"since": since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_full_sync(self):
+        data = self.changes(0)
+        self.assertEqual(data["seq"], self.milk.change_seq)
+        self.assertEqual(
+            [ingredient["name"] for ingredient in data["changed"]],
+            ["соль", "мука", "молоко"],
+        )
+        self.assertEqual(data["deleted"], [])
+        self.assertEqual(
+            set(data["changed"][0]), {"id", "name", "measurement_unit"}
+        )
+
+    def test_incremental(self):
+        seq = self.changes(0)["seq"]
+        self.assertEqual(
+            self.changes(seq), {"seq": seq, "changed": [], "deleted": []}
+        )
+
+        self.salt.measurement_unit = "кг"
+        self.salt.save()
+        flour_id = self.flour.pk
+        self.flour.delete()
+        data = self.changes(seq)
+        self.assertEqual(data["seq"], seq + 2)
+        self.assertEqual(
+            data["changed"],
+            [{"id": self.salt.pk, "name": "соль", "measurement_unit": "кг"}],
+        )
+        self.assertEqual(data["deleted"], [flour_id])
+        self.assertEqual(
+            self.changes(data["seq"]),
+            {"seq": data["seq"], "changed": [], "deleted": []},
+        )
+
+    def test_delete_latest_change(self):
+        # Удаляется ингредиент с последним номером изменения.
+        seq = self.changes(0)["seq"]
+        milk_id = self.milk.pk
+        self.milk.delete()
+        Ingredient.objects.create(name="молоко", measurement_unit="мл")
+        data = self.changes(seq)
+        self.assertEqual(data["seq"], seq + 2)
+        self.assertEqual(len(data["changed"]), 1)
+        self.assertEqual(data["deleted"], [milk_id])
+
+    def test_invalid_since(self):
+        for since in ("-1", "abc", "1.5"):
+            with self.subTest(since):
+                response = self.client.get(self.url, {"since": since})
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,132 @@
+import csv
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from recipes.models import Ingredient
+
+from api import ingredient_search
+from api.ingredient_search import (
+    IngredientIndex,
+    _distance,
+    levenshtein,
+    normalize,
+    trigrams,
+)
+
+# С запасом для медленных CI-машин: на полном справочнике запрос к
+# прогретому индексу занимает единицы миллисекунд.
+QUERY_TIME_LIMIT = 0.02
+
+
+class FuzzyMatchingTests(TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize("  Свёкла "), "свекла")
+        self.assertEqual(normalize("ЁЖЕВИКА"), "ежевика")
+
+    def test_trigrams(self):
+        self.assertEqual(
+            trigrams("сыр"), {"  с", " сы", "сыр", "ыр "}
+        )
+
+    def test_levenshtein(self):
+        self.assertEqual(levenshtein("kitten", "sitting"), 3)
+        self.assertEqual(levenshtein("", "мука"), 4)
+        self.assertEqual(levenshtein("мука", "мука"), 0)
+
+    def test_prefix_bonus(self):
+        # Одна замена в обоих случаях, но опечатка в начале слова
+        # ранжируется ниже опечатки в конце.
+        self.assertLess(
+            _distance("помидор", "помидар"), _distance("помидор", "памидор")
+        )
+
+    def test_query_matches_word_prefix(self):
+        self.assertEqual(_distance("огурцы", "огурцы соленые"), -2)
+        self.assertEqual(_distance("соленые", "огурцы соленые"), -2)
+
+
+class IngredientIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        path = settings.BASE_DIR.parent / "data" / "ingredients.csv"
+        with open(path, encoding="utf-8") as file:
+            Ingredient.objects.bulk_create(
+                Ingredient(name=name, measurement_unit=unit)
+                for name, unit in csv.reader(file)
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.index = IngredientIndex()
+
+    def top(self, query):
+        return [
+            ingredient["name"] for ingredient in self.index.search(query, 3)
+        ]
+
+    def test_typos(self):
+        for query, expected in (
+            ("картофел", "картофель"),
+            ("картошка", "картофель"),
+            ("картофль", "картофель"),
+            ("памидор", "помидоры"),
+            ("помидр", "помидоры"),
+            ("помедоры", "помидоры"),
+            ("сметна", "сметана"),
+            ("агурцы", "огурцы"),
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(self.top(query)[0], expected)
+
+    def test_yo(self):
+        self.assertEqual(self.top("свёкла"), self.top("свекла"))
+        self.assertEqual(self.top("ёжевика")[0], "ежевика")
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search("zzz"), [])
+        self.assertEqual(self.index.search("  "), [])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search("помидоры", 2)), 2)
+
+    def test_query_time(self):
+        queries = ("картошка", "памидор", "сметна", "агурцы", "свёкла")
+        self.index.search(queries[0])
+        for query in queries:
+            with self.subTest(query=query):
+                started = time.perf_counter()
+                self.index.search(query)
+                self.assertLess(
+                    time.perf_counter() - started, QUERY_TIME_LIMIT
+                )
+
+    def test_rebuild_on_version_change(self):
+        self.assertNotIn("тамарилло", self.top("тамарилло"))
+        with self.assertNumQueries(0):
+            self.index.search("тамарилло")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tamarillo = Ingredient.objects.create(
+                name="тамарилло", measurement_unit="г"
+            )
+        self.assertEqual(
+            self.index.search("тамарилло", 1),
+            [
+                {
+                    "id": tamarillo.pk,
+                    "name": "тамарилло",
+                    "measurement_unit": "г",
+                }
+            ],
+        )
+
+    def test_api(self):
+        ingredient_search.index = self.index
+        self.addCleanup(setattr, ingredient_search, "index", IngredientIndex())
+        response = self.client.get(
+            "/api/ingredients/", {"name": "картошка", "fuzzy": "1"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.index.search("картошка"))
@@ -0,0 +1,230 @@
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from PIL import Image
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscription,
+    User,
+)
+from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.query_budget import QueryBudgetExceeded, assert_query_budget
+
+
+def image_data():
+    buffer = BytesIO()
+    Image.new("RGB", (2, 2), "red").save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class BudgetFixtureMixin:
+    # Больше QUERY_REPEAT_THRESHOLD строк на странице: N+1 не спрячется.
+    authors_count = 8
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root))
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(
+                email=f"user{index}@example.com",
+                username=f"user{index}",
+                first_name="Имя",
+                last_name="Фамилия",
+                password="password",
+            )
+            for index in range(cls.authors_count)
+        ]
+        cls.user = cls.users[0]
+        cls.token = Token.objects.create(user=cls.user)
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"ингредиент {index}", measurement_unit="г")
+            for index in range(3)
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=author,
+                name=f"Рецепт {author.pk}-{index}",
+                text="Описание",
+                image="recipes/images/recipe.png",
+                cooking_time=10,
+            )
+            for author in cls.users
+            for index in range(2)
+        ]
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in cls.recipes
+            for ingredient in cls.ingredients[:2]
+        )
+        for author in cls.users[1:]:
+            Subscription.objects.create(subscriber=cls.user, author=author)
+            Subscription.objects.create(subscriber=author, author=cls.user)
+        for recipe in cls.recipes[2:]:
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        cls.own_recipe = cls.recipes[0]
+        cls.other_recipe = cls.recipes[-1]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_RAISE=True)
+class QueryBudgetTests(BudgetFixtureMixin, TestCase):
+    """Каждое действие с query_budgets укладывается в бюджет и не делает
+    N+1; при нарушении middleware выбрасывает QueryBudgetExceeded."""
+
+    def request(self, method, url, status=200, **kwargs):
+        response = getattr(self.client, method)(url, format="json", **kwargs)
+        self.assertEqual(
+            response.status_code,
+            status,
+            None if response.streaming else response.content,
+        )
+        return response
+
+    def test_read_actions(self):
+        author = self.users[1]
+        urls = [
+            "/api/users/?limit=10",
+            f"/api/users/{author.pk}/",
+            "/api/users/me/",
+            "/api/users/subscriptions/?limit=10&recipes_limit=2",
+            f"/api/users/{self.user.pk}/followers/",
+            "/api/ingredients/",
+            "/api/ingredients/?name=ингр",
+            f"/api/ingredients/{self.ingredients[0].pk}/",
+            "/api/ingredients/changes/?since=0",
+            "/api/recipes/?limit=20",
+            "/api/recipes/?limit=20&is_favorited=1",
+            "/api/recipes/?limit=20&is_in_shopping_cart=1",
+            f"/api/recipes/{self.other_recipe.pk}/",
+            "/api/recipes/download_shopping_cart/",
+            f"/api/recipes/{self.other_recipe.pk}/get-link/",
+        ]
+        for fast in (False, True):
+            for cached in (False, True):
+                with override_settings(
+                    FAST_LIST_SERIALIZATION=fast, RECIPE_CACHE=cached
+                ):
+                    for url in urls:
+                        with self.subTest(url, fast=fast, cached=cached):
+                            self.request("get", url)
+
+    def test_anonymous_read_actions(self):
+        self.client.credentials()
+        for url in ("/api/users/?limit=10", "/api/recipes/?limit=20"):
+            with self.subTest(url):
+                self.request("get", url)
+
+    def test_subscribe(self):
+        author = self.users[1]
+        url = f"/api/users/{author.pk}/subscribe/"
+        self.request("delete", url, 204)
+        self.request("post", url, 201)
+
+    def test_avatar(self):
+        self.request(
+            "put", "/api/users/me/avatar/", data={"avatar": image_data()}
+        )
+        self.request("delete", "/api/users/me/avatar/", 204)
+
+    def test_recipe_write_actions(self):
+        data = {
+            "ingredients": [
+                {"id": ingredient.pk, "amount": 5}
+                for ingredient in self.ingredients
+            ],
+            "name": "Новый рецепт",
+            "image": image_data(),
+            "text": "Описание",
+            "cooking_time": 15,
+        }
+        recipe_id = self.request(
+            "post", "/api/recipes/", 201, data=data
+        ).json()["id"]
+        self.request(
+            "patch",
+            f"/api/recipes/{recipe_id}/",
+            data={**data, "ingredients": data["ingredients"][:1]},
+        )
+        self.request("delete", f"/api/recipes/{recipe_id}/", 204)
+
+    def test_relations(self):
+        for relation in ("favorite", "shopping_cart"):
+            url = f"/api/recipes/{self.own_recipe.pk}/{relation}/"
+            with self.subTest(relation):
+                self.request("post", url, 201)
+                self.request("delete", url, 204)
+
+    def test_per_row_query_raises(self):
+        def is_favorited(serializer, recipe):
+            return Favorite.objects.filter(
+                user=self.user, recipe=recipe
+            ).exists()
+
+        with override_settings(FAST_LIST_SERIALIZATION=False), mock.patch(
+            "api.serializers.RecipeListSerializer.get_is_favorited",
+            is_favorited,
+        ):
+            with self.assertRaisesMessage(
+                QueryBudgetExceeded, "поле RecipeListSerializer.is_favorited"
+            ):
+                self.client.get("/api/recipes/?limit=20")
+
+
+class AssertQueryBudgetTests(BudgetFixtureMixin, TestCase):
+    def test_serializer_field_named(self):
+        class ProbeSerializer(serializers.ModelSerializer):
+            favorited = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Recipe
+                fields = ("id", "favorited")
+
+            def get_favorited(self, recipe):
+                return recipe.favorite_set.exists()
+
+        recipes = list(Recipe.objects.all())
+        with self.assertRaisesMessage(
+            QueryBudgetExceeded, "поле ProbeSerializer.favorited"
+        ):
+            with assert_query_budget():
+                ProbeSerializer(recipes, many=True).data
+
+    def test_budget(self):
+        with self.assertRaisesMessage(
+            QueryBudgetExceeded, "2 запросов при бюджете 1"
+        ):
+            with assert_query_budget(budget=1):
+                list(Recipe.objects.all())
+                list(Ingredient.objects.all())
+        with assert_query_budget(budget=1) as counter:
+            list(Recipe.objects.all())
+        self.assertEqual(counter.total, 1)
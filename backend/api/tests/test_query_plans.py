@@ -0,0 +1,89 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscription,
+    User,
+)
+
+from api.management.commands.check_query_plans import Command
+
+
+class IndexTests(TestCase):
+    def assert_index(self, model, name, columns):
+        constraints = connection.introspection.get_constraints(
+            connection.cursor(), model._meta.db_table
+        )
+        self.assertIn(name, constraints)
+        self.assertTrue(constraints[name]["index"])
+        self.assertEqual(constraints[name]["columns"], columns)
+
+    def test_indexes(self):
+        self.assert_index(Recipe, "recipe_pub_date_idx", ["pub_date"])
+        self.assert_index(
+            Recipe, "recipe_author_pub_date_idx", ["author_id", "pub_date"]
+        )
+        self.assert_index(
+            Subscription,
+            "subscription_author_idx",
+            ["author_id", "subscriber_id"],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "только PostgreSQL")
+    def test_ingredient_name_index(self):
+        constraints = connection.introspection.get_constraints(
+            connection.cursor(), Ingredient._meta.db_table
+        )
+        self.assertIn("ingredient_name_upper_prefix_idx", constraints)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN только PostgreSQL")
+class QueryPlanTests(TestCase):
+    """Основные запросы API обходятся без Seq Scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, author = (
+            User.objects.create_user(
+                email=f"{username}@example.com",
+                username=username,
+                first_name=username,
+                last_name=username,
+                password="password",
+            )
+            for username in ("reader", "author")
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit="г")
+            for name in ("картофель", "капуста", "морковь")
+        )
+        recipes = [
+            Recipe.objects.create(
+                author=author,
+                name=f"Рецепт {index}",
+                text="Описание",
+                image="recipes/images/recipe.png",
+                cooking_time=index * 10 + 5,
+            )
+            for index in range(3)
+        ]
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in recipes
+            for ingredient in ingredients
+        )
+        Subscription.objects.create(subscriber=cls.user, author=author)
+        Favorite.objects.create(user=cls.user, recipe=recipes[0])
+        ShoppingCart.objects.create(user=cls.user, recipe=recipes[1])
+
+    def test_no_seq_scan(self):
+        command = Command()
+        for name, queryset in command.get_querysets(self.user).items():
+            with self.subTest(name):
+                self.assertNotIn("Seq Scan", command.explain(queryset))
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from recipes.models import Ingredient, Recipe, RecipeIngredient, User
+from rest_framework.test import APIClient
+
+
+class RecipeCacheRetrieveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com",
+            username="author",
+            first_name="Автор",
+            last_name="Тестов",
+            password="password",
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name="Рецепт",
+            text="Описание",
+            image="recipes/images/recipe.png",
+            cooking_time=10,
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=cls.recipe, ingredient=ingredient, amount=1
+            )
+            for ingredient in Ingredient.objects.bulk_create(
+                Ingredient(name=name, measurement_unit="г")
+                for name in ("соль", "мука")
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = f"/api/recipes/{self.recipe.pk}/"
+
+    def get(self, url=None):
+        return self.client.get(url or self.url)
+
+    def test_same_response_as_serializer(self):
+        with override_settings(RECIPE_CACHE=False):
+            expected = self.get().json()
+        with override_settings(RECIPE_CACHE=True):
+            self.assertEqual(self.get().json(), expected)
+
+    @override_settings(RECIPE_CACHE=True)
+    def test_queries(self):
+        # Промах: проверка доступа, строка рецепта и ингредиенты.
+        with self.assertNumQueries(3):
+            self.assertEqual(self.get().status_code, 200)
+        # Попадание: только проверка доступа.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get().status_code, 200)
+
+    @override_settings(RECIPE_CACHE=True)
+    def test_not_found(self):
+        self.get()
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            deleted_at=timezone.now()
+        )
+        self.assertEqual(self.get().status_code, 404)
+        self.assertEqual(self.get("/api/recipes/0/").status_code, 404)
+        self.assertEqual(self.get("/api/recipes/abc/").status_code, 404)
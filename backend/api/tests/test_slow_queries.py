@@ -0,0 +1,23 @@
+import logging
+import os
+import tempfile
+
+from django.test import SimpleTestCase
+
+from api.slow_queries import SlowQueryFileHandler
+
+
+class SlowQueryFileHandlerTests(SimpleTestCase):
+    def test_directory_created_on_first_record(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        path = os.path.join(root.name, "logs", "slow_queries.log")
+        handler = SlowQueryFileHandler(path, delay=True)
+        self.addCleanup(handler.close)
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+
+        handler.emit(
+            logging.makeLogRecord({"msg": "slow query", "levelno": 30})
+        )
+        with open(path, encoding="utf-8") as log:
+            self.assertEqual(log.read(), "slow query\n")
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import RequestFactory, SimpleTestCase
+from rest_framework.request import Request
+
+from api.throttling import ImageUploadThrottle, TokenBucketThrottle
+
+
+class BucketThrottle(TokenBucketThrottle):
+    scope = "test"
+    rate = "10/min"
+
+
+class TokenBucketThrottleTests(SimpleTestCase):
+    """10/min: корзина на 10 запросов, токен возвращается раз в 6 с."""
+
+    def setUp(self):
+        self.now = 1_000_000.0
+        self.cache = LocMemCache("throttle-tests", {})
+        self.cache.clear()
+        self.request = SimpleNamespace(
+            user=SimpleNamespace(is_authenticated=True, pk=1)
+        )
+
+    def throttle(self):
+        throttle = BucketThrottle()
+        throttle.cache = self.cache
+        throttle.timer = lambda: self.now
+        return throttle
+
+    def allowed(self, count=1):
+        return [
+            self.throttle().allow_request(self.request, None)
+            for _ in range(count)
+        ]
+
+    def test_burst(self):
+        self.assertEqual(self.allowed(10), [True] * 10)
+
+    def test_rejected_after_burst(self):
+        self.allowed(10)
+        throttle = self.throttle()
+        self.assertFalse(throttle.allow_request(self.request, None))
+        self.assertEqual(throttle.wait(), 6)
+        self.now += 2.5
+        throttle = self.throttle()
+        self.assertFalse(throttle.allow_request(self.request, None))
+        self.assertEqual(throttle.wait(), 3.5)
+
+    def test_rejected_request_does_not_use_token(self):
+        self.allowed(10)
+        self.assertEqual(self.allowed(5), [False] * 5)
+        self.now += 6
+        self.assertEqual(self.allowed(2), [True, False])
+
+    def test_refill(self):
+        self.allowed(10)
+        self.now += 6
+        self.assertEqual(self.allowed(2), [True, False])
+        self.now += 60
+        self.assertEqual(self.allowed(11), [True] * 10 + [False])
+
+    def test_stale_arrival_is_reset(self):
+        self.cache.set("throttle:test:1", int(self.now * 1000) - 10**9)
+        self.assertEqual(self.allowed(11), [True] * 10 + [False])
+
+    def test_ttl(self):
+        now = int(self.now * 1000)
+        self.assertEqual(TokenBucketThrottle.ttl(now + 60_000, now), 61)
+        self.assertEqual(TokenBucketThrottle.ttl(now + 1, now), 2)
+        self.assertEqual(TokenBucketThrottle.ttl(now - 5_000, now), 1)
+
+    def test_key_lives_until_stored_arrival(self):
+        timeouts = []
+        for method in ("set", "touch"):
+            original = getattr(self.cache, method)
+
+            def record(key, *args, original=original):
+                timeouts.append(args[-1])
+                return original(key, *args)
+
+            setattr(self.cache, method, record)
+        self.allowed(10)
+        # После каждого пропущенного запроса — на 6 с больше.
+        self.assertEqual(timeouts, [7, 13, 19, 25, 31, 37, 43, 49, 55, 61])
+        timeouts.clear()
+        self.allowed()
+        self.assertEqual(timeouts, [61])
+
+    def test_anonymous_clients_are_separate(self):
+        anonymous = Request(RequestFactory().get("/", REMOTE_ADDR="10.0.0.1"))
+        anonymous.user = AnonymousUser()
+        throttle = self.throttle()
+        self.assertEqual(
+            throttle.get_cache_key(anonymous, None), "throttle:test:10.0.0.1"
+        )
+        self.allowed(11)
+        self.assertTrue(throttle.allow_request(anonymous, None))
+
+    def test_image_upload_without_image(self):
+        throttle = ImageUploadThrottle()
+        self.assertTrue(
+            throttle.allow_request(SimpleNamespace(data={"name": "x"}), None)
+        )
@@ -0,0 +1,86 @@
+from math import ceil
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Token bucket в виде GCRA: в кэше хранится теоретическое время
+    прихода следующего запроса (мс), которое сдвигается атомарным incr.
+
+    Ставка "30/min" означает корзину на 30 запросов, которая полностью
+    пополняется за минуту.
+    """
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    def __init__(self):
+        super().__init__()
+        if self.rate is not None:
+            self.period_ms = self.duration * 1000
+            self.interval_ms = max(self.period_ms // self.num_requests, 1)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+    @staticmethod
+    def ttl(arrival, now):
+        """Срок жизни ключа — до сохранённого времени прихода: после него
+        корзина полна, и пропавший ключ означает то же самое. Меньший TTL
+        выдал бы постоянному клиенту новую полную корзину."""
+        return max(ceil((arrival - now) / 1000), 0) + 1
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = int(self.timer() * 1000)
+        try:
+            arrival = self.cache.incr(self.key, self.interval_ms)
+        except ValueError:
+            arrival = None
+        if arrival is None or arrival < now + self.interval_ms:
+            # Корзина полна: ключа нет или запись устарела. Гонка двух
+            # одновременных запросов здесь пропускает оба, что допустимо.
+            arrival = now + self.interval_ms
+            self.cache.set(self.key, arrival, self.ttl(arrival, now))
+        elif arrival - now <= self.period_ms:
+            self.cache.touch(self.key, self.ttl(arrival, now))
+
+        if arrival - now <= self.period_ms:
+            return True
+        # Отклонённый запрос не расходует токен.
+        try:
+            self.cache.decr(self.key, self.interval_ms)
+        except ValueError:
+            pass
+        self.cache.touch(self.key, self.ttl(arrival - self.interval_ms, now))
+        self.wait_ms = arrival - self.period_ms - now
+        return False
+
+    def wait(self):
+        return self.wait_ms / 1000
+
+
+class ExportThrottle(TokenBucketThrottle):
+    scope = "export"
+
+
+class WriteThrottle(TokenBucketThrottle):
+    scope = "write"
+
+
+class ImageUploadThrottle(TokenBucketThrottle):
+    scope = "image_upload"
+    image_fields = ("image", "avatar", "file")
+
+    def allow_request(self, request, view):
+        if not any(field in request.data for field in self.image_fields):
+            return True
+        return super().allow_request(request, view)
@@ -1,7 +1,15 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, UserViewSet
+from .views import (
+    BatchView,
+    DatabasePoolStatsView,
+    EventTicketView,
+    IngredientViewSet,
+    RecipeViewSet,
+    UserViewSet,
+    event_stream,
+)
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet, basename="user")
@@ -10,5 +18,9 @@ router.register(r"ingredients", IngredientViewSet, basename="ingredients")
 
 urlpatterns = [
     path("auth/", include("djoser.urls.authtoken")),
+    path("batch/", BatchView.as_view()),
+    path("events/", event_stream),
+    path("events/ticket/", EventTicketView.as_view()),
+    path("metrics/db-pool/", DatabasePoolStatsView.as_view()),
     path("", include(router.urls)),
 ]
@@ -0,0 +1,35 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+INGREDIENTS_VERSION = "version:ingredients"
+
+
+def get_versions(keys):
+    """Версии данных из общего кэша, одним запросом на все ключи."""
+    versions = cache.get_many(keys)
+    for key in set(keys) - versions.keys():
+        # Начальная версия по времени, а не 0: после вытеснения ключа
+        # версии закэшированное по старым версиям не станет снова актуальным.
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+        versions[key] = version
+    return versions
+
+
+def bump_version(key):
+    """Увеличивает версию после фиксации текущей транзакции."""
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def ingredients_changed(sender, **kwargs):
+    bump_version(INGREDIENTS_VERSION)
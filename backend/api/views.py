@@ -1,32 +1,57 @@
+import os
 from datetime import datetime
 
-from django.db import models
-from django.http import FileResponse
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef
+from django.http import (
+    FileResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
+from recipes.changes import last_change_seq
+from recipes.deletion import mark_deleted
 from recipes.models import (
     Favorite,
     Ingredient,
+    IngredientTombstone,
     Recipe,
     RecipeIngredient,
     ShoppingCart,
     Subscription,
     User,
 )
-from rest_framework import status, viewsets
+from recipes.storage import delete_if_unreferenced
+from rest_framework import generics, status, viewsets
+from rest_framework.authtoken.models import Token
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import (
     AllowAny,
+    IsAdminUser,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from . import fast_serializers, recipe_cache
+from .batch import run_batch
+from .db import pool_stats
+from .events import issue_ticket, stream_events, ticket_user_id
 from .filters import RecipeFilter
+from .ingredient_catalog import catalog
+from .ingredient_search import fuzzy_search
+from .pagination import CreatedKeysetPagination
+from .parsers import StreamingFileUploadParser, StreamingMultiPartParser
 from .permissons import IsAuthorOrReadOnly
 from .serializers import (
+    BatchSerializer,
+    FollowerSerializer,
+    ImageUploadSerializer,
     IngredientSerializer,
     RecipeListSerializer,
     RecipeSerializer,
@@ -35,20 +60,80 @@ from .serializers import (
     UserProfileSerializer,
     UserWithRecipesSerializer,
 )
+from .throttling import ExportThrottle, ImageUploadThrottle, WriteThrottle
+
+
+@transaction.atomic
+def save_uploaded_image(request, instance, field_name):
+    # Транзакция держит блокировку имени файла (recipes/storage.py)
+    # до записи ссылки на него.
+    serializer = ImageUploadSerializer(
+        data={
+            "image": request.FILES.get(field_name)
+            or request.FILES.get("file")
+        }
+    )
+    serializer.is_valid(raise_exception=True)
+    upload = serializer.validated_data["image"]
+    field_file = getattr(instance, field_name)
+    old_name = field_file.name
+    field_file.save(upload.name, upload, save=False)
+    upload.close()
+    instance.save(update_fields=[field_name])
+    if old_name and old_name != field_file.name:
+        delete_if_unreferenced(field_file.storage, old_name)
+
 
+class FastListMixin:
+    fast_list_rows = None
+    fast_list_render = None
 
-class UserViewSet(DjoserUserViewSet):
+    def get_fast_list(self):
+        if not settings.FAST_LIST_SERIALIZATION or self.fast_list_rows is None:
+            return None
+        return self.fast_list_rows, self.fast_list_render
+
+    def list(self, request, *args, **kwargs):
+        fast_list = self.get_fast_list()
+        if fast_list is None:
+            return super().list(request, *args, **kwargs)
+        get_rows, render = fast_list
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = get_rows(queryset)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(render(list(rows), request))
+        return self.get_paginated_response(render(page, request))
+
+
+class UserViewSet(FastListMixin, DjoserUserViewSet):
     serializer_class = UserProfileSerializer
+    read_from_replica = True
+    query_budgets = {
+        "list": 6,
+        "retrieve": 4,
+        "me": 8,
+        "subscribe": 10,
+        "subscriptions": 7,
+        "followers": 6,
+        "avatar": 4,
+    }
+    fast_list_rows = staticmethod(fast_serializers.user_rows)
+    fast_list_render = staticmethod(fast_serializers.render_users)
 
     def get_permissions(self):
         if self.action == "me":
             return [IsAuthenticated()]
         return super().get_permissions()
 
+    def perform_destroy(self, instance):
+        mark_deleted(instance)
+
     @action(
         detail=True,
         methods=["post", "delete"],
         permission_classes=[IsAuthenticated],
+        throttle_classes=[WriteThrottle],
     )
     def subscribe(self, request, id=None):
         author_to_follow = get_object_or_404(User, id=id)
@@ -99,7 +184,7 @@ class UserViewSet(DjoserUserViewSet):
     def subscriptions(self, request):
         subscriptions = request.user.subscriptions.select_related(
             "author"
-        ).all()
+        ).filter(author__deleted_at__isnull=True)
         authors = [sub.author for sub in subscriptions]
 
         page = self.paginate_queryset(authors)
@@ -111,10 +196,44 @@ class UserViewSet(DjoserUserViewSet):
             ).data
         )
 
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[AllowAny],
+        pagination_class=CreatedKeysetPagination,
+    )
+    def followers(self, request, id=None):
+        author = get_object_or_404(User, id=id)
+        subscriptions = (
+            Subscription.objects.filter(
+                author=author, subscriber__deleted_at__isnull=True
+            )
+            .select_related("subscriber")
+            .annotate(
+                is_mutual=Exists(
+                    Subscription.objects.filter(
+                        subscriber=author, author=OuterRef("subscriber")
+                    )
+                )
+            )
+        )
+        followers = []
+        for subscription in self.paginate_queryset(subscriptions):
+            follower = subscription.subscriber
+            follower.is_mutual = subscription.is_mutual
+            follower.followed_at = subscription.created
+            followers.append(follower)
+        return self.get_paginated_response(
+            FollowerSerializer(
+                followers, many=True, context={"request": request}
+            ).data
+        )
+
     @action(
         detail=False,
         methods=["put", "delete"],
         permission_classes=[IsAuthenticated],
+        throttle_classes=[ImageUploadThrottle],
         serializer_class=UserAvatarSerializer,
         url_path="me/avatar",
     )
@@ -130,7 +249,10 @@ class UserViewSet(DjoserUserViewSet):
             )
         elif request.method == "DELETE":
             if user.avatar:
-                user.avatar.delete()
+                name = user.avatar.name
+                user.avatar = None
+                user.save(update_fields=["avatar"])
+                delete_if_unreferenced(user.avatar.storage, name)
                 return Response(status=status.HTTP_204_NO_CONTENT)
             return Response(
                 {"detail": "Аватар не найден."},
@@ -138,12 +260,38 @@ class UserViewSet(DjoserUserViewSet):
             )
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
+    @action(
+        detail=False,
+        methods=["put"],
+        permission_classes=[IsAuthenticated],
+        throttle_classes=[ImageUploadThrottle],
+        parser_classes=[StreamingMultiPartParser, StreamingFileUploadParser],
+        url_path="me/avatar/upload",
+    )
+    def avatar_upload(self, request):
+        save_uploaded_image(request, request.user, "avatar")
+        return Response(
+            UserAvatarSerializer(
+                request.user, context={"request": request}
+            ).data
+        )
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
     permission_classes = [AllowAny]
+    read_from_replica = True
+    query_budgets = {"list": 3, "retrieve": 3, "changes": 6}
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get("name")
+        if name and request.query_params.get("fuzzy") in ("1", "true"):
+            return Response(fuzzy_search(name))
+        if name or request.accepted_renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+        return catalog.response(request)
 
     def get_queryset(self):
         queryset = self.queryset
@@ -152,43 +300,117 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(name__istartswith=name)
         return queryset
 
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        since = request.query_params.get("since", "0")
+        if not since.isdigit():
+            return Response(
+                {"since": "Ожидается целое неотрицательное число."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Верхняя граница читается первой: изменения, зафиксированные
+        # после неё, попадут в следующий ответ, а не потеряются.
+        seq = last_change_seq()
+        window = {"change_seq__gt": int(since), "change_seq__lte": seq}
+        return Response(
+            {
+                "seq": seq,
+                "changed": IngredientSerializer(
+                    Ingredient.objects.filter(**window).order_by(
+                        "change_seq"
+                    ),
+                    many=True,
+                ).data,
+                "deleted": list(
+                    IngredientTombstone.objects.filter(**window)
+                    .order_by("change_seq")
+                    .values_list("ingredient_id", flat=True)
+                ),
+            }
+        )
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipeViewSet(FastListMixin, viewsets.ModelViewSet):
+    # Быстрые списки берут .values_list() и эти связи не загружают.
+    queryset = Recipe.objects.select_related("author").prefetch_related(
+        "recipe_ingredients__ingredient"
+    )
+    fast_list_rows = staticmethod(fast_serializers.recipe_rows)
+    fast_list_render = staticmethod(fast_serializers.render_recipes)
+    read_from_replica = True
+    query_budgets = {
+        "list": 10,
+        "retrieve": 9,
+        "create": 20,
+        "partial_update": 20,
+        "destroy": 7,
+        "favorite": 10,
+        "shopping_cart": 10,
+        "download_shopping_cart": 5,
+        "get_link": 4,
+    }
     filter_backends = [DjangoFilterBackend, SearchFilter]
     filterset_class = RecipeFilter
     search_fields = ["name"]
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
 
+    def get_queryset(self):
+        if self.action in ["favorite", "shopping_cart"]:
+            # Ответ — RecipeSerializer: автор и ингредиенты не нужны.
+            return Recipe.objects.all()
+        return super().get_queryset()
+
     def get_serializer_class(self):
         if self.action in ["create", "partial_update"]:
             return RecipeWriteSerializer
         return RecipeListSerializer
 
-    def get_queryset(self):
-        qs = super().get_queryset()
-        user = self.request.user
-        if user.is_authenticated:
-            if self.request.query_params.get("is_favorited") == "1":
-                qs = qs.filter(favorite_set__user=user)
-            if self.request.query_params.get("is_in_shopping_cart") == "1":
-                qs = qs.filter(shoppingcart_set__user=user)
-        return qs
+    def get_throttles(self):
+        if self.action in ["create", "partial_update", "destroy"]:
+            return [WriteThrottle(), ImageUploadThrottle()]
+        return super().get_throttles()
+
+    def get_fast_list(self):
+        if settings.RECIPE_CACHE:
+            return recipe_cache.recipe_rows, recipe_cache.render_recipes
+        return super().get_fast_list()
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.RECIPE_CACHE:
+            return super().retrieve(request, *args, **kwargs)
+        # Только проверка доступа и мягкого удаления; сам рецепт — из кэша,
+        # при промахе его соберёт recipe_cache без prefetch.
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = generics.get_object_or_404(
+            self.filter_queryset(Recipe.objects.all()).values_list(
+                "pk", "author_id"
+            ),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]},
+        )
+        self.check_object_permissions(
+            request, Recipe(pk=row[0], author_id=row[1])
+        )
+        return Response(recipe_cache.render_recipes([row], request)[0])
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def perform_destroy(self, instance):
+        mark_deleted(instance)
+
     @action(
         detail=False,
         methods=["get"],
         permission_classes=[IsAuthenticated],
+        throttle_classes=[ExportThrottle],
     )
     def download_shopping_cart(self, request):
         user = request.user
 
         ingredients = (
             RecipeIngredient.objects.filter(
-                recipe__shoppingcart_set__user=user
+                recipe__shoppingcart_set__user=user,
+                recipe__deleted_at__isnull=True,
             )
             .values("ingredient__name", "ingredient__measurement_unit")
             .annotate(total_amount=models.Sum("amount"))
@@ -237,6 +459,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         detail=True,
         methods=["post", "delete"],
         permission_classes=[IsAuthenticated],
+        throttle_classes=[WriteThrottle],
     )
     def favorite(self, request, pk=None):
         return self._toggle_relation(request, self.get_object(), Favorite)
@@ -245,10 +468,25 @@ class RecipeViewSet(viewsets.ModelViewSet):
         detail=True,
         methods=["post", "delete"],
         permission_classes=[IsAuthenticated],
+        throttle_classes=[WriteThrottle],
     )
     def shopping_cart(self, request, pk=None):
         return self._toggle_relation(request, self.get_object(), ShoppingCart)
 
+    @action(
+        detail=True,
+        methods=["put"],
+        permission_classes=[IsAuthenticated, IsAuthorOrReadOnly],
+        throttle_classes=[ImageUploadThrottle],
+        parser_classes=[StreamingMultiPartParser, StreamingFileUploadParser],
+    )
+    def image(self, request, pk=None):
+        recipe = self.get_object()
+        save_uploaded_image(request, recipe, "image")
+        return Response(
+            RecipeListSerializer(recipe, context={"request": request}).data
+        )
+
     def _toggle_relation(self, request, recipe, model):
         user = request.user
         loc_name = "в избранном" if model == Favorite else "в корзине"
@@ -288,3 +526,91 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
         short_url = request.build_absolute_uri(f"/s/{pk}")
         return Response({"short-link": short_url})
+
+
+class DatabasePoolStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({"pid": os.getpid(), "pools": pool_stats()})
+
+
+class BatchView(APIView):
+    """Несколько GET-запросов к API за один запрос клиента."""
+
+    permission_classes = [AllowAny]
+    read_from_replica = True
+    # Одинаковые запросы разных подзапросов — не N+1.
+    check_repeated_queries = False
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            {
+                "responses": run_batch(
+                    request,
+                    serializer.validated_data["requests"],
+                    serializer.validated_data["parallel"],
+                )
+            }
+        )
+
+
+class EventTicketView(APIView):
+    """Билет для ?ticket= потока /api/events/."""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response(
+            {
+                "ticket": issue_ticket(request.user),
+                "expires_in": settings.EVENTS_TICKET_MAX_AGE,
+            }
+        )
+
+
+async def _event_stream_user(request):
+    # EventSource не умеет передавать заголовки, поэтому вместо токена
+    # в адресе передаётся короткоживущий билет из EventTicketView.
+    keyword, _, key = request.headers.get("Authorization", "").partition(" ")
+    if keyword == "Token" and key:
+        try:
+            token = await Token.objects.select_related("user").aget(key=key)
+        except Token.DoesNotExist:
+            return None
+        return token.user
+    ticket = request.GET.get("ticket")
+    if ticket:
+        user_id = ticket_user_id(ticket)
+        if user_id is None:
+            return None
+        return await User.objects.filter(pk=user_id).afirst()
+    return await request.auser()
+
+
+async def event_stream(request):
+    """Поток server-sent events пользователя: новые рецепты авторов из
+    подписок, изменения избранного, списка покупок и подписок."""
+    user = await _event_stream_user(request)
+    if user is None or not user.is_authenticated or not user.is_active:
+        return JsonResponse(
+            {"detail": "Учетные данные не были предоставлены."},
+            status=status.HTTP_401_UNAUTHORIZED,
+            json_dumps_params={"ensure_ascii": False},
+        )
+    author_ids = [
+        author_id
+        async for author_id in Subscription.objects.filter(
+            subscriber=user
+        ).values_list("author_id", flat=True)
+    ]
+    response = StreamingHttpResponse(
+        stream_events(user.pk, author_ids),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Ответ не должен задерживаться в буфере nginx.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -89,6 +89,11 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.middleware.DatabasePoolTimeoutMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
+    "api.middleware.ProfilingMiddleware",
+    "api.middleware.QueryBudgetMiddleware",
+    "api.middleware.SlowQueryContextMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -122,8 +127,29 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
     "DEFAULT_PAGINATION_CLASS": "api.pagination.LimitAsPageNumberPagination",  # noqa: E501
+    "DEFAULT_THROTTLE_RATES": {
+        "export": os.getenv("THROTTLE_EXPORT_RATE", "10/min"),
+        "write": os.getenv("THROTTLE_WRITE_RATE", "60/min"),
+        "image_upload": os.getenv("THROTTLE_IMAGE_UPLOAD_RATE", "10/min"),
+    },
 }
 
+# Сборка list-ответов пользователей и рецептов из .values() в обход
+# ModelSerializer (см. api/fast_serializers.py)
+FAST_LIST_SERIALIZATION = (
+    os.getenv("FAST_LIST_SERIALIZATION", "False") == "True"
+)
+
+# Кэш общей части рецептов по версиям рецепта, автора и справочника
+# ингредиентов; флаги пользователя подставляются поверх (api/recipe_cache.py)
+RECIPE_CACHE = os.getenv("RECIPE_CACHE", "False") == "True"
+RECIPE_CACHE_TIMEOUT = int(os.getenv("RECIPE_CACHE_TIMEOUT", "86400"))
+
+# Пакет GET-запросов /api/batch/ (api/batch.py); при "parallel": true
+# подзапросы выполняются в BATCH_MAX_WORKERS потоках
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "4"))
+
 DJOSER = {
     "USER_ID_FIELD": "id",
     "LOGIN_FIELD": "email",
@@ -165,6 +191,78 @@ else:
             "PASSWORD": os.getenv("DATABASE_PASSWORD", "postgres"),
             "HOST": os.getenv("DATABASE_HOST", "foodgram-db"),
             "PORT": os.getenv("DATABASE_PORT", "5432"),
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+    if os.getenv("DATABASE_POOL", "False") == "True":
+        # Пул psycopg несовместим с постоянными соединениями Django.
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"] = {
+            "pool": {
+                "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", "2")),
+                "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", "10")),
+                "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+                "max_idle": float(os.getenv("DATABASE_POOL_MAX_IDLE", "600")),
+            }
+        }
+    else:
+        DATABASES["default"]["CONN_MAX_AGE"] = int(
+            os.getenv("DATABASE_CONN_MAX_AGE", "60")
+        )
+
+# Реплики для чтения: DATABASE_REPLICAS=host[:port][/name],...
+DATABASE_REPLICAS = []
+for index, replica in enumerate(
+    filter(None, os.getenv("DATABASE_REPLICAS", "").split(","))
+):
+    address, _, name = replica.partition("/")
+    host, _, port = address.partition(":")
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"].get("PORT", ""),
+        "NAME": name or DATABASES["default"]["NAME"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["api.db_router.ReplicaRouter"]
+
+# Сколько секунд после записи клиент читает только с основной БД
+DATABASE_REPLICA_PIN_SECONDS = int(
+    os.getenv("DATABASE_REPLICA_PIN_SECONDS", "10")
+)
+
+# Поток событий /api/events/ (api/events.py), обслуживается ASGI-сервером.
+# Между процессами события идут через LISTEN/NOTIFY PostgreSQL, без него —
+# только внутри процесса.
+EVENTS_BACKEND = os.getenv(
+    "EVENTS_BACKEND",
+    "api.events.PostgresBackend"
+    if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql"
+    else "api.events.LocalBackend",
+)
+EVENTS_HEARTBEAT = int(os.getenv("EVENTS_HEARTBEAT", "20"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_RETRY_MS = int(os.getenv("EVENTS_RETRY_MS", "5000"))
+# Срок действия билета POST /api/events/ticket/ в секундах
+EVENTS_TICKET_MAX_AGE = int(os.getenv("EVENTS_TICKET_MAX_AGE", "60"))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         }
     }
 
@@ -209,6 +307,86 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+STORAGES = {
+    "default": {
+        "BACKEND": "recipes.storage.ContentAddressedStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Recipe snapshots
+# Страницы /s/<id>/ с OpenGraph-разметкой, которые nginx отдаёт без
+# бэкенда (recipes/snapshots.py). Недостающие снимки создаёт
+# build_snapshots, перерисовывает все — build_snapshots --all.
+
+SNAPSHOTS_ENABLED = os.getenv("SNAPSHOTS_ENABLED", "False") == "True"
+SNAPSHOT_ROOT = os.getenv(
+    "SNAPSHOT_ROOT", os.path.join(BASE_DIR, "snapshots")
+)
+SITE_URL = os.getenv("SITE_URL", "http://localhost").rstrip("/")
+
+# Profiling
+# Персонал включает профилирование заголовком PROFILING_HEADER; кроме того,
+# профилируется каждый PROFILING_SAMPLE_RATE-й запрос (0 — выключено).
+
+PROFILING_HEADER = "X-Profile"
+PROFILING_SAMPLE_RATE = int(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", "100"))
+
+# Slow query log
+# Запросы дольше SLOW_QUERY_THRESHOLD_MS пишутся в SLOW_QUERY_LOG в формате
+# JSON Lines; сводка — python manage.py slow_query_report.
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_STACK_DEPTH = 8
+SLOW_QUERY_LOG = os.getenv(
+    "SLOW_QUERY_LOG", os.path.join(BASE_DIR, "logs", "slow_queries.log")
+)
+
+# Query budgets
+# Число SQL-запросов сверяется с query_budgets представления, запрос,
+# повторённый больше QUERY_REPEAT_THRESHOLD раз, считается N+1
+# (api/query_budget.py). Тесты включают проверку с исключением
+# через override_settings (api/tests/test_query_budget.py).
+
+QUERY_BUDGET_ENABLED = os.getenv("QUERY_BUDGET_ENABLED", "False") == "True"
+QUERY_BUDGET_RAISE = os.getenv("QUERY_BUDGET_RAISE", "False") == "True"
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "json": {"()": "api.slow_queries.JsonFormatter"},
+    },
+    "handlers": {
+        "slow_queries": {
+            "class": "api.slow_queries.SlowQueryFileHandler",
+            "filename": SLOW_QUERY_LOG,
+            "maxBytes": 50 * 1024 * 1024,
+            "backupCount": 5,
+            "formatter": "json",
+            "delay": True,
+        },
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "foodgram.slow_queries": {
+            "handlers": ["slow_queries"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+        "foodgram.query_budget": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
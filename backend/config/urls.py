@@ -20,7 +20,19 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from api.admin import profile_download_view, profiles_view
+
 urlpatterns = [
+    path(
+        "admin/profiles/",
+        admin.site.admin_view(profiles_view),
+        name="admin-profiles",
+    ),
+    path(
+        "admin/profiles/<str:name>.prof",
+        admin.site.admin_view(profile_download_view),
+        name="admin-profile-download",
+    ),
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
     path("", include("recipes.urls")),
@@ -5,6 +5,7 @@ from django.db.models import Count
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
+from .deletion import mark_deleted
 from .models import (
     Favorite,
     Ingredient,
@@ -112,8 +113,28 @@ class CookingTimeFilter(admin.SimpleListFilter):
         return queryset
 
 
+class MarkDeletedAdminMixin:
+    """Удаление только помечает записи: связанные данные не собираются
+    для страницы подтверждения, их удаляет process_deletions."""
+
+    def get_deleted_objects(self, objs, request):
+        return (
+            [str(obj) for obj in objs],
+            {self.model._meta.verbose_name_plural: len(objs)},
+            set(),
+            [],
+        )
+
+    def delete_model(self, request, obj):
+        mark_deleted(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            mark_deleted(obj)
+
+
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(MarkDeletedAdminMixin, BaseUserAdmin):
     fieldsets = (
         (None, {"fields": ("id", "username", "password")}),
         (
@@ -196,9 +217,14 @@ class UserAdmin(BaseUserAdmin):
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
-    list_display = ("subscriber", "author")
-    list_filter = ("subscriber", "author")
+    list_display = ("subscriber", "author", "created")
+    list_select_related = ("subscriber", "author")
+    # list_filter по автору выводил всех пользователей списком и
+    # фильтровал без индекса; подписчики автора — /api/users/{id}/followers/.
+    raw_id_fields = ("subscriber", "author")
     search_fields = ("subscriber__username", "author__username")
+    ordering = ("-created",)
+    show_full_result_count = False
     empty_value_display = "-пусто-"
 
     class Meta:
@@ -229,7 +255,7 @@ class IngredientAdmin(admin.ModelAdmin):
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(MarkDeletedAdminMixin, admin.ModelAdmin):
     list_display = (
         "id",
         "name",
@@ -252,6 +278,8 @@ class RecipeAdmin(admin.ModelAdmin):
     readonly_fields = (
         "pub_date",
         "favorite_count",
+        "popularity",
+        "trending_score",
         "image_preview",
     )
     empty_value_display = "-пусто-"
@@ -293,7 +321,7 @@ class RecipeIngredientAdmin(admin.ModelAdmin):
 
 @admin.register(Favorite, ShoppingCart)
 class RecipeAssociationAdmin(admin.ModelAdmin):
-    list_display = ("user", "recipe")
+    list_display = ("user", "recipe", "created")
     list_filter = ("user", "recipe")
     search_fields = ("user__username", "recipe__name")
     empty_value_display = "-пусто-"
@@ -1,7 +1,28 @@
 from django.apps import AppConfig
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "recipes"
     verbose_name = "Рецепты"
+
+    def ready(self):
+        from . import changes, rankings, snapshots
+        from .models import Ingredient, Recipe, User
+
+        pre_save.connect(changes.ingredient_saving, sender=Ingredient)
+        pre_delete.connect(changes.ingredient_deleting, sender=Ingredient)
+        for model in rankings.COUNTERS:
+            post_save.connect(rankings.association_saved, sender=model)
+            post_delete.connect(rankings.association_deleted, sender=model)
+        for signal in (post_save, post_delete):
+            signal.connect(snapshots.recipe_changed, sender=Recipe)
+        post_save.connect(snapshots.author_changed, sender=User)
+        post_save.connect(snapshots.ingredient_changed, sender=Ingredient)
+        pre_delete.connect(snapshots.ingredient_changed, sender=Ingredient)
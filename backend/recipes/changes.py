@@ -0,0 +1,53 @@
+from django.db import connection
+from django.db.models import Max
+from django.db.transaction import TransactionManagementError
+
+from .models import Ingredient, IngredientTombstone
+
+CHANGE_SEQUENCE = "recipes_ingredient_change_seq"
+# Ключ pg_advisory_xact_lock: номера изменений фиксируются в порядке
+# выдачи, и клиент не пропустит изменение из более поздней транзакции.
+CHANGE_LOCK_ID = 4_172_031
+
+
+def last_change_seq():
+    return max(
+        Ingredient.objects.aggregate(seq=Max("change_seq"))["seq"] or 0,
+        IngredientTombstone.objects.aggregate(seq=Max("change_seq"))["seq"]
+        or 0,
+    )
+
+
+def next_change_seqs(count=1):
+    """Новые номера изменений справочника ингредиентов. Только внутри
+    транзакции: блокировка держится до её фиксации, и более поздний номер
+    не станет виден раньше."""
+    if not connection.in_atomic_block:
+        raise TransactionManagementError(
+            "Номера изменений ингредиентов выдаются только внутри "
+            "transaction.atomic()."
+        )
+    if connection.vendor != "postgresql":
+        # Без последовательностей; SQLite и так пишет строго по очереди.
+        last = last_change_seq()
+        return list(range(last + 1, last + 1 + count))
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [CHANGE_LOCK_ID])
+        cursor.execute(
+            f"SELECT nextval('{CHANGE_SEQUENCE}') "
+            "FROM generate_series(1, %s)",
+            [count],
+        )
+        return [seq for seq, in cursor.fetchall()]
+
+
+def ingredient_saving(sender, instance, **kwargs):
+    instance.change_seq = next_change_seqs()[0]
+
+
+def ingredient_deleting(sender, instance, **kwargs):
+    # pre_delete: удаляемая строка ещё учитывается в last_change_seq,
+    # и номер надгробия будет больше её номера.
+    IngredientTombstone.objects.create(
+        ingredient_id=instance.pk, change_seq=next_change_seqs()[0]
+    )
@@ -0,0 +1,110 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Favorite,
+    Recipe,
+    RecipeActivity,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscription,
+    User,
+)
+from .snapshots import schedule as schedule_snapshots
+from .storage import delete_if_unreferenced
+
+# Счётчики активности удаляются первыми: иначе сигналы удаления избранного
+# и корзины будут их уменьшать.
+RECIPE_DEPENDENTS = (RecipeActivity, Favorite, ShoppingCart, RecipeIngredient)
+USER_DEPENDENTS = (
+    (Favorite, "user"),
+    (ShoppingCart, "user"),
+    (Subscription, "subscriber"),
+    (Subscription, "author"),
+)
+
+
+def mark_deleted(instance):
+    """Скрывает пользователя или рецепт из всех выборок сразу; связанные
+    записи и файлы удаляет process_deletions."""
+    now = timezone.now()
+    if isinstance(instance, Recipe):
+        Recipe.all_objects.filter(pk=instance.pk).update(deleted_at=now)
+        schedule_snapshots([instance.pk])
+        return
+    with transaction.atomic():
+        # Email и username освобождаются сразу, вход для токенов закрыт
+        # через is_active.
+        User.all_objects.filter(pk=instance.pk).update(
+            deleted_at=now,
+            is_active=False,
+            username=f"deleted-{instance.pk}",
+            email=f"deleted-{instance.pk}@deleted.invalid",
+        )
+        recipes = Recipe.all_objects.filter(
+            author_id=instance.pk, deleted_at__isnull=True
+        )
+        schedule_snapshots(list(recipes.values_list("pk", flat=True)))
+        recipes.update(deleted_at=now)
+
+
+def delete_in_batches(queryset, batch_size):
+    """Удаляет записи выборки порциями, каждая в своей короткой транзакции."""
+    model = queryset.model
+    deleted = 0
+    while pks := list(queryset.values_list("pk", flat=True)[:batch_size]):
+        with transaction.atomic():
+            deleted += model._base_manager.filter(pk__in=pks).delete()[0]
+    return deleted
+
+
+def purge_recipe(recipe_id, batch_size):
+    image = (
+        Recipe.all_objects.filter(pk=recipe_id)
+        .values_list("image", flat=True)
+        .first()
+    )
+    for model in RECIPE_DEPENDENTS:
+        delete_in_batches(
+            model.objects.filter(recipe_id=recipe_id), batch_size
+        )
+    Recipe.all_objects.filter(pk=recipe_id).delete()
+    delete_if_unreferenced(Recipe._meta.get_field("image").storage, image)
+
+
+def purge_user(user_id, batch_size):
+    for recipe_id in Recipe.all_objects.filter(author_id=user_id).values_list(
+        "pk", flat=True
+    ):
+        purge_recipe(recipe_id, batch_size)
+    for model, field in USER_DEPENDENTS:
+        delete_in_batches(
+            model.objects.filter(**{field: user_id}), batch_size
+        )
+    avatar = (
+        User.all_objects.filter(pk=user_id)
+        .values_list("avatar", flat=True)
+        .first()
+    )
+    User.all_objects.filter(pk=user_id).delete()
+    delete_if_unreferenced(User._meta.get_field("avatar").storage, avatar)
+
+
+def process_deletions(batch_size=500):
+    """Удаляет помеченных пользователей и рецепты вместе со связанными
+    записями; возвращает число удалённых пользователей и рецептов."""
+    users = list(
+        User.all_objects.filter(deleted_at__isnull=False)
+        .order_by("deleted_at")
+        .values_list("pk", flat=True)
+    )
+    for user_id in users:
+        purge_user(user_id, batch_size)
+    recipes = list(
+        Recipe.all_objects.filter(deleted_at__isnull=False)
+        .order_by("deleted_at")
+        .values_list("pk", flat=True)
+    )
+    for recipe_id in recipes:
+        purge_recipe(recipe_id, batch_size)
+    return len(users), len(recipes)
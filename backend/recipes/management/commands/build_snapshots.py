@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Статические страницы рецептов для коротких ссылок: создаются "
+        "недостающие, снимки удалённых рецептов стираются"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help=(
+                "Перерисовать снимки всех рецептов (после изменения "
+                "шаблона или SITE_URL)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        written, unchanged, removed = snapshots.rebuild(
+            options["chunk_size"], force=options["all"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{settings.SNAPSHOT_ROOT}: записано {written}, "
+                f"без изменений {unchanged}, удалено {removed}"
+            )
+        )
@@ -0,0 +1,94 @@
+import json
+import shutil
+import sys
+from pathlib import Path
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+from recipes.models import Recipe, RecipeIngredient
+
+
+class Command(BaseCommand):
+    help = "Потоковая выгрузка рецептов в NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output", help="Файл для выгрузки или '-' для stdout"
+        )
+        parser.add_argument(
+            "--media-dir",
+            help="Каталог, куда копируются изображения рецептов",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        media_dir = options["media_dir"] and Path(options["media_dir"])
+        recipes = (
+            Recipe.objects.select_related("author")
+            .prefetch_related(
+                Prefetch(
+                    "recipe_ingredients",
+                    queryset=RecipeIngredient.objects.select_related(
+                        "ingredient"
+                    ),
+                )
+            )
+            .order_by("pk")
+        )
+
+        output = (
+            sys.stdout
+            if options["output"] == "-"
+            else open(options["output"], "w", encoding="utf-8")
+        )
+        exported = 0
+        try:
+            for recipe in recipes.iterator(chunk_size=options["chunk_size"]):
+                output.write(
+                    json.dumps(self.serialize(recipe), ensure_ascii=False)
+                    + "\n"
+                )
+                if media_dir and recipe.image:
+                    self.copy_image(recipe.image.name, media_dir)
+                exported += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        self.stderr.write(
+            self.style.SUCCESS(f"Выгружено рецептов: {exported}")
+        )
+
+    def serialize(self, recipe):
+        author = recipe.author
+        return {
+            "id": recipe.pk,
+            "author": {
+                "email": author.email,
+                "username": author.username,
+                "first_name": author.first_name,
+                "last_name": author.last_name,
+            },
+            "name": recipe.name,
+            "text": recipe.text,
+            "cooking_time": recipe.cooking_time,
+            "pub_date": recipe.pub_date.isoformat(),
+            "image": recipe.image.name,
+            "ingredients": [
+                {
+                    "name": item.ingredient.name,
+                    "measurement_unit": item.ingredient.measurement_unit,
+                    "amount": item.amount,
+                }
+                for item in recipe.recipe_ingredients.all()
+            ],
+        }
+
+    def copy_image(self, name, media_dir):
+        target = media_dir / name
+        if target.exists():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with default_storage.open(name) as source, open(target, "wb") as dst:
+            shutil.copyfileobj(source, dst)
@@ -0,0 +1,176 @@
+import json
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from recipes.changes import next_change_seqs
+from recipes.models import (
+    ImportProgress,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    User,
+)
+from recipes.signals import ingredients_loaded
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковая загрузка рецептов из NDJSON (см. export_recipes) "
+        "с продолжением после прерывания"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Файл NDJSON")
+        parser.add_argument(
+            "--media-dir",
+            help="Каталог с изображениями, выгруженными export_recipes",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Игнорировать сохранённый прогресс и начать сначала",
+        )
+
+    def handle(self, *args, **options):
+        self.media_dir = options["media_dir"] and Path(options["media_dir"])
+        source = str(Path(options["input"]).resolve())
+        if options["restart"]:
+            ImportProgress.objects.filter(source=source).delete()
+        progress, _ = ImportProgress.objects.get_or_create(source=source)
+        done = progress.done
+        if done:
+            self.stdout.write(f"Продолжение с записи {done}")
+
+        self.ingredients = {
+            (name, unit): pk
+            for pk, name, unit in Ingredient.objects.values_list(
+                "pk", "name", "measurement_unit"
+            )
+        }
+
+        with open(options["input"], encoding="utf-8") as source:
+            lines = islice(source, done, None)
+            while chunk := [
+                json.loads(line)
+                for line in islice(lines, options["chunk_size"])
+            ]:
+                # Прогресс сохраняется в той же транзакции, что и кусок:
+                # после сбоя кусок не будет загружен повторно.
+                with transaction.atomic():
+                    self.import_chunk(chunk)
+                    done += len(chunk)
+                    progress.done = done
+                    progress.save(update_fields=["done", "updated"])
+                self.stdout.write(f"Загружено записей: {done}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Импорт завершён, записей: {done}")
+        )
+
+    def import_chunk(self, chunk):
+        authors = self.resolve_authors(item["author"] for item in chunk)
+        self.resolve_ingredients(
+            ingredient for item in chunk for ingredient in item["ingredients"]
+        )
+
+        recipes = Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    author=authors[item["author"]["email"]],
+                    name=item["name"],
+                    text=item["text"],
+                    cooking_time=item["cooking_time"],
+                    image=self.import_image(item["image"]),
+                )
+                for item in chunk
+            ]
+        )
+        # auto_now_add перезаписывает pub_date при вставке.
+        for recipe, item in zip(recipes, chunk):
+            recipe.pub_date = datetime.fromisoformat(item["pub_date"])
+        Recipe.objects.bulk_update(recipes, ["pub_date"])
+
+        RecipeIngredient.objects.bulk_create(
+            [
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient_id=self.ingredients[
+                        (ingredient["name"], ingredient["measurement_unit"])
+                    ],
+                    amount=ingredient["amount"],
+                )
+                for recipe, item in zip(recipes, chunk)
+                for ingredient in item["ingredients"]
+            ]
+        )
+
+    def resolve_authors(self, authors):
+        authors = {author["email"]: author for author in authors}
+        existing = {
+            user.email: user
+            for user in User.objects.filter(email__in=authors)
+        }
+        missing = [
+            User(**data) for email, data in authors.items()
+            if email not in existing
+        ]
+        for user in missing:
+            user.set_unusable_password()
+        User.objects.bulk_create(missing, ignore_conflicts=True)
+        if missing:
+            existing.update(
+                (user.email, user)
+                for user in User.objects.filter(
+                    email__in=[user.email for user in missing]
+                )
+            )
+        unresolved = set(authors) - set(existing)
+        if unresolved:
+            raise CommandError(
+                "Не удалось создать авторов (занят username?): "
+                + ", ".join(sorted(unresolved))
+            )
+        return existing
+
+    def resolve_ingredients(self, ingredients):
+        missing = {
+            (item["name"], item["measurement_unit"])
+            for item in ingredients
+        } - self.ingredients.keys()
+        if not missing:
+            return
+        # bulk_create не вызывает pre_save: номера изменений выдаются здесь,
+        # в транзакции куска, как в load_ingredients.
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(name=name, measurement_unit=unit, change_seq=seq)
+                for (name, unit), seq in zip(
+                    missing, next_change_seqs(len(missing))
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        self.ingredients.update(
+            ((name, unit), pk)
+            for pk, name, unit in Ingredient.objects.filter(
+                name__in=[name for name, _ in missing]
+            ).values_list("pk", "name", "measurement_unit")
+        )
+        # Версия справочника увеличится после фиксации транзакции куска:
+        # каталог и индекс нечёткого поиска пересоберутся.
+        ingredients_loaded.send(sender=Ingredient)
+
+    def import_image(self, name):
+        if not name or not self.media_dir:
+            return name
+        source = self.media_dir / name
+        if not source.exists():
+            return name
+        with open(source, "rb") as image:
+            return default_storage.save(name, File(image))
@@ -3,7 +3,10 @@ from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.changes import next_change_seqs
 from recipes.models import Ingredient
+from recipes.signals import ingredients_loaded
 
 
 class Command(BaseCommand):
@@ -19,10 +22,18 @@ class Command(BaseCommand):
 
             new_objs = [Ingredient(**item) for item in ingredients_data]
 
-            created = Ingredient.objects.bulk_create(
-                new_objs,
-                ignore_conflicts=True,
-            )
+            # bulk_create не вызывает pre_save: номера изменений выдаются
+            # здесь, в одной транзакции со вставкой.
+            with transaction.atomic():
+                for obj, seq in zip(
+                    new_objs, next_change_seqs(len(new_objs))
+                ):
+                    obj.change_seq = seq
+                created = Ingredient.objects.bulk_create(
+                    new_objs,
+                    ignore_conflicts=True,
+                )
+            ingredients_loaded.send(sender=Ingredient)
 
             self.stdout.write(
                 self.style.SUCCESS(
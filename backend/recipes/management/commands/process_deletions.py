@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from recipes.deletion import process_deletions
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаление помеченных пользователей и рецептов порциями "
+        "вместе со связанными записями и файлами"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Повторять каждые N секунд (0 — один проход)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            users, recipes = process_deletions(options["batch_size"])
+            if users or recipes:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Удалено пользователей: {users}, рецептов: {recipes}"
+                    )
+                )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
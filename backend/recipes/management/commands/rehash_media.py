@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.models import Recipe, User
+from recipes.storage import HASHED_NAME_RE, delete_if_unreferenced
+
+
+class Command(BaseCommand):
+    help = (
+        "Перенос изображений рецептов и аватаров в хранилище "
+        "с именами по хэшу содержимого"
+    )
+    fields = ((Recipe, "image"), (User, "avatar"))
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        for model, field_name in self.fields:
+            storage = model._meta.get_field(field_name).storage
+            files = (
+                model.objects.exclude(**{f"{field_name}__isnull": True})
+                .exclude(**{field_name: ""})
+                .values_list("pk", field_name)
+            )
+            moved = 0
+            for pk, name in files.iterator(chunk_size=options["chunk_size"]):
+                if HASHED_NAME_RE.search(name):
+                    continue
+                if not storage.exists(name):
+                    self.stdout.write(
+                        self.style.WARNING(f"Файл не найден: {name}")
+                    )
+                    continue
+                moved += 1
+                if options["dry_run"]:
+                    continue
+                with transaction.atomic():
+                    with storage.open(name) as content:
+                        new_name = storage.save(name, content)
+                    # save() вместо update(): post_save сбрасывает кэш
+                    # рецептов.
+                    model(pk=pk, **{field_name: new_name}).save(
+                        update_fields=[field_name]
+                    )
+                delete_if_unreferenced(storage, name)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model._meta.verbose_name_plural}: "
+                    f"перенесено файлов {moved}"
+                )
+            )
@@ -0,0 +1,204 @@
+import multiprocessing
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from recipes import seeding
+from recipes.models import Recipe, User
+
+# Этапы загрузки: внутри этапа куски независимы и идут параллельно,
+# следующий этап ссылается на строки предыдущего.
+PHASES = (
+    ("users",),
+    ("recipes",),
+    ("recipe_ingredients", "favorites", "shopping_carts", "subscriptions"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Синтетические пользователи, рецепты, избранное, корзины и "
+        "подписки для нагрузочного тестирования: COPY в PostgreSQL, "
+        "пакетный INSERT в остальных СУБД"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument("--favorites", type=int, default=50000)
+        parser.add_argument("--shopping-carts", type=int, default=10000)
+        parser.add_argument("--subscriptions", type=int, default=20000)
+        parser.add_argument(
+            "--ingredients-per-recipe",
+            type=int,
+            nargs=2,
+            default=(3, 12),
+            metavar=("MIN", "MAX"),
+        )
+        parser.add_argument(
+            "--author-skew",
+            type=float,
+            default=1.0,
+            help="Показатель степенного закона числа рецептов у автора",
+        )
+        parser.add_argument(
+            "--popularity-skew",
+            type=float,
+            default=1.0,
+            help=(
+                "Показатель степенного закона популярности рецептов "
+                "и авторов (избранное, корзины, подписчики)"
+            ),
+        )
+        parser.add_argument(
+            "--activity-skew",
+            type=float,
+            default=0.8,
+            help=(
+                "Показатель степенного закона активности пользователей "
+                "(сколько у них избранного, корзин и подписок)"
+            ),
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="За сколько дней до --now распределяются даты",
+        )
+        parser.add_argument(
+            "--now",
+            type=datetime.fromisoformat,
+            help="Точка отсчёта дат (ISO 8601), по умолчанию начало суток",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Число процессов-генераторов (только PostgreSQL)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Пользователей или рецептов в одном куске-транзакции",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--skip-rankings",
+            action="store_true",
+            help="Не пересчитывать популярность (update_trending --rebuild)",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 2:
+            raise CommandError("Нужно хотя бы два пользователя.")
+        low, high = options["ingredients_per_recipe"]
+        if not 1 <= low <= high:
+            raise CommandError("Неверный диапазон --ingredients-per-recipe.")
+        # Проверка до резервирования id и сохранения картинки: повторный
+        # запуск упал бы на уникальности username, оставив сдвинутые
+        # последовательности и лишний файл.
+        prefix = f"seed{options['seed']}-"
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Пользователи {prefix}* уже есть в базе, укажите другой "
+                "--seed."
+            )
+        ingredient_ids = seeding.real_ingredient_ids(
+            settings.BASE_DIR.parent / "data" / "ingredients.csv"
+        )
+        if not ingredient_ids:
+            raise CommandError(
+                "Ингредиенты из data/ingredients.csv не найдены в базе, "
+                "сначала выполните load_ingredients."
+            )
+        workers = options["workers"]
+        if workers > 1 and connection.vendor != "postgresql":
+            self.stderr.write(
+                "Параллельная запись поддерживается только для PostgreSQL, "
+                "используется один процесс."
+            )
+            workers = 1
+
+        now = options["now"] or datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        plan = seeding.SeedPlan(
+            seed=options["seed"],
+            users=options["users"],
+            recipes=options["recipes"],
+            favorites=options["favorites"] if options["recipes"] else 0,
+            shopping_carts=(
+                options["shopping_carts"] if options["recipes"] else 0
+            ),
+            subscriptions=options["subscriptions"],
+            first_user_id=seeding.reserve_ids(User, options["users"]),
+            first_recipe_id=seeding.reserve_ids(Recipe, options["recipes"]),
+            ingredient_ids=ingredient_ids,
+            ingredients_per_recipe=(low, high),
+            author_skew=options["author_skew"],
+            popularity_skew=options["popularity_skew"],
+            activity_skew=options["activity_skew"],
+            activity_weight=seeding.power_law_total(
+                options["users"], options["activity_skew"]
+            ),
+            days=options["days"],
+            now=now,
+            password=seeding.seed_password(),
+            image=seeding.placeholder_image(),
+            prefix=prefix,
+        )
+
+        totals = dict.fromkeys(seeding.KINDS, 0)
+        for phase in PHASES:
+            tasks = [
+                task
+                for kind in phase
+                if kind not in ("favorites", "shopping_carts")
+                or getattr(plan, kind)
+                for task in seeding.chunks(
+                    plan, kind, options["chunk_size"], options["batch_size"]
+                )
+            ]
+            for kind, written in self.run(tasks, workers):
+                totals[kind] += written
+            self.stdout.write(
+                ", ".join(f"{kind}: {totals[kind]}" for kind in phase)
+            )
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model, *_ in seeding.KINDS.values():
+                    cursor.execute(f"ANALYZE {model._meta.db_table}")
+        if not options["skip_rankings"]:
+            call_command(
+                "update_trending",
+                rebuild=True,
+                batch_size=options["batch_size"],
+                stdout=self.stdout,
+            )
+        summary = ", ".join(
+            f"{kind}: {count}" for kind, count in totals.items()
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Готово, пользователи {plan.prefix}*: {summary}"
+            )
+        )
+
+    def run(self, tasks, workers):
+        if workers == 1:
+            return map(seeding.seed_chunk, tasks)
+        # Дочерние процессы открывают свои соединения; унаследованные
+        # сокеты использовать нельзя.
+        connections.close_all()
+        return self._pooled(tasks, workers)
+
+    def _pooled(self, tasks, workers):
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            yield from pool.imap_unordered(seeding.seed_chunk, tasks)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from recipes.rankings import rebuild_activity, update_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчёт популярности рецептов (ordering=popular и "
+        "ordering=trending) по почасовым счётчикам"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help=(
+                "Сначала пересобрать почасовые счётчики по избранному "
+                "и корзинам"
+            ),
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            buckets = rebuild_activity(options["batch_size"])
+            self.stdout.write(f"Пересобрано почасовых счётчиков: {buckets}")
+        updated = update_scores(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Обновлены оценки рецептов: {updated}")
+        )
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:57
+
+from django.db import migrations, models
+
+INGREDIENT_NAME_INDEX = "ingredient_name_upper_prefix_idx"
+
+
+def create_ingredient_name_index(apps, schema_editor):
+    # istartswith в PostgreSQL строится как UPPER("name"::text) LIKE ...,
+    # поэтому индекс функциональный и с text_pattern_ops.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INGREDIENT_NAME_INDEX} "
+        "ON recipes_ingredient (UPPER(name::text) text_pattern_ops)"
+    )
+
+
+def drop_ingredient_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INGREDIENT_NAME_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-pub_date'], name='recipe_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['author', 'subscriber'], name='subscription_author_idx'),
+        ),
+        migrations.RunPython(
+            create_ingredient_name_index, drop_ingredient_name_index
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(db_index=True, upload_to='recipes/images/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, db_index=True, null=True, upload_to='avatars/', verbose_name='Ссылка на аватар'),
+        ),
+    ]
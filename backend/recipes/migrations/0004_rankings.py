@@ -0,0 +1,106 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+COUNTERS = (("Favorite", "favorites"), ("ShoppingCart", "shopping_carts"))
+
+
+def backfill_rankings(apps, schema_editor):
+    """Время добавления существующих записей неизвестно. Ставим дату
+    публикации рецепта (раньше запись появиться не могла): иначе все они
+    получили бы время миграции и попали бы в окно trending. Почасовые
+    счётчики заполняются здесь же, update_trending --rebuild не нужен."""
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeActivity = apps.get_model("recipes", "RecipeActivity")
+    pub_date = models.Subquery(
+        Recipe.objects.filter(pk=models.OuterRef("recipe_id")).values(
+            "pub_date"
+        )[:1]
+    )
+    pub_dates = dict(Recipe.objects.values_list("pk", "pub_date"))
+    activity = {}
+    for model_name, counter in COUNTERS:
+        model = apps.get_model("recipes", model_name)
+        model.objects.update(created=pub_date)
+        for recipe_id, total in (
+            model.objects.values("recipe_id")
+            .annotate(total=models.Count("pk"))
+            .values_list("recipe_id", "total")
+        ):
+            hour = pub_dates[recipe_id].replace(
+                minute=0, second=0, microsecond=0
+            )
+            activity.setdefault(
+                recipe_id, RecipeActivity(recipe_id=recipe_id, hour=hour)
+            )
+            setattr(activity[recipe_id], counter, total)
+    RecipeActivity.objects.bulk_create(activity.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_media_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='Час')),
+                ('favorites', models.IntegerField(default=0, verbose_name='В избранном')),
+                ('shopping_carts', models.IntegerField(default=0, verbose_name='В корзине')),
+            ],
+            options={
+                'verbose_name': 'Активность по рецепту',
+                'verbose_name_plural': 'Активность по рецептам',
+            },
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность за неделю'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-popularity', '-pub_date'], name='recipe_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-pub_date'], name='recipe_trending_idx'),
+        ),
+        migrations.AddField(
+            model_name='recipeactivity',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AddIndex(
+            model_name='recipeactivity',
+            index=models.Index(fields=['hour'], name='recipe_activity_hour_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeactivity',
+            constraint=models.UniqueConstraint(fields=('recipe', 'hour'), name='unique_recipe_activity_hour'),
+        ),
+        migrations.RunPython(backfill_rankings, migrations.RunPython.noop),
+    ]
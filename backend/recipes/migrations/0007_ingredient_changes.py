@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:18
+
+from django.db import migrations, models
+
+CHANGE_SEQUENCE = "recipes_ingredient_change_seq"
+
+
+def number_existing_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    Ingredient.objects.update(change_seq=models.F("id"))
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS {CHANGE_SEQUENCE}")
+    schema_editor.execute(
+        f"SELECT setval('{CHANGE_SEQUENCE}', "
+        "GREATEST(COALESCE(MAX(change_seq), 0), 1)) FROM recipes_ingredient"
+    )
+
+
+def drop_change_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP SEQUENCE IF EXISTS {CHANGE_SEQUENCE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingredient_id', models.BigIntegerField(verbose_name='ID ингредиента')),
+                ('change_seq', models.BigIntegerField(db_index=True, verbose_name='Номер изменения')),
+            ],
+            options={
+                'verbose_name': 'Удалённый ингредиент',
+                'verbose_name_plural': 'Удалённые ингредиенты',
+            },
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='change_seq',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Номер изменения'),
+        ),
+        migrations.RunPython(
+            number_existing_ingredients, drop_change_sequence
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_ingredient_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата подписки'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['author', '-created', '-id'], name='subscription_followers_idx'),
+        ),
+    ]
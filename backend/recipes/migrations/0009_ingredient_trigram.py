@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:41
+
+from django.db import DatabaseError, migrations, transaction
+
+TRIGRAM_INDEX = "ingredient_name_trgm_idx"
+
+
+def create_trigram_index(apps, schema_editor):
+    # Без прав на CREATE EXTENSION нечёткий поиск ингредиентов работает
+    # по индексу в памяти процесса (api/ingredient_search.py).
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} "
+        "ON recipes_ingredient USING gin (name gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_subscription_created'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
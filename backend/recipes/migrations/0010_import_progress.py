@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_ingredient_trigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=1024, unique=True, verbose_name='Файл')),
+                ('done', models.PositiveBigIntegerField(default=0, verbose_name='Загружено записей')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Прогресс импорта',
+                'verbose_name_plural': 'Прогресс импорта',
+            },
+        ),
+    ]
@@ -1,8 +1,19 @@
 from django.conf import settings
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+
+
+class ActiveManager(models.Manager):
+    """Скрывает записи, помеченные на удаление (см. recipes/deletion.py)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class ActiveUserManager(ActiveManager, UserManager):
+    pass
 
 
 class User(AbstractUser):
@@ -22,9 +33,19 @@ class User(AbstractUser):
     first_name = models.CharField("Имя", max_length=150)
     last_name = models.CharField("Фамилия", max_length=150)
     avatar = models.ImageField(
-        "Ссылка на аватар", upload_to="avatars/", null=True, blank=True
+        "Ссылка на аватар",
+        upload_to="avatars/",
+        null=True,
+        blank=True,
+        db_index=True,
+    )
+    deleted_at = models.DateTimeField(
+        "Помечен на удаление", null=True, blank=True, editable=False
     )
 
+    objects = ActiveUserManager()
+    all_objects = UserManager()
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
 
@@ -32,6 +53,13 @@ class User(AbstractUser):
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
         ordering = ("username",)
+        indexes = [
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(deleted_at__isnull=False),
+                name="user_deleted_at_idx",
+            ),
+        ]
 
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -50,6 +78,7 @@ class Subscription(models.Model):
         on_delete=models.CASCADE,
         verbose_name="Автор",
     )
+    created = models.DateTimeField("Дата подписки", auto_now_add=True)
 
     class Meta:
         verbose_name = "Подписка"
@@ -63,6 +92,16 @@ class Subscription(models.Model):
                 name="prevent_self_subscription",
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["author", "subscriber"],
+                name="subscription_author_idx",
+            ),
+            models.Index(
+                fields=["author", "-created", "-id"],
+                name="subscription_followers_idx",
+            ),
+        ]
 
 
 class Ingredient(models.Model):
@@ -72,6 +111,9 @@ class Ingredient(models.Model):
     measurement_unit = models.CharField(
         max_length=64, verbose_name="Единица измерения"
     )
+    change_seq = models.BigIntegerField(
+        "Номер изменения", default=0, editable=False, db_index=True
+    )
 
     class Meta:
         verbose_name = "Ингредиент"
@@ -87,6 +129,23 @@ class Ingredient(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Номер изменения выдаётся в pre_save (recipes/changes.py) и
+        # должен зафиксироваться вместе со строкой.
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class IngredientTombstone(models.Model):
+    """Удалённый ингредиент для синхронизации справочника по изменениям."""
+
+    ingredient_id = models.BigIntegerField("ID ингредиента")
+    change_seq = models.BigIntegerField("Номер изменения", db_index=True)
+
+    class Meta:
+        verbose_name = "Удалённый ингредиент"
+        verbose_name_plural = "Удалённые ингредиенты"
+
 
 class Recipe(models.Model):
     name = models.CharField("Название", max_length=256)
@@ -97,7 +156,9 @@ class Recipe(models.Model):
         verbose_name="Автор",
     )
     text = models.TextField("Описание")
-    image = models.ImageField("Изображение", upload_to="recipes/images/")
+    image = models.ImageField(
+        "Изображение", upload_to="recipes/images/", db_index=True
+    )
     cooking_time = models.PositiveIntegerField(
         "Время приготовления (минуты)", validators=[MinValueValidator(1)]
     )
@@ -108,11 +169,45 @@ class Recipe(models.Model):
         verbose_name="Ингредиенты",
     )
     pub_date = models.DateTimeField("Дата публикации", auto_now_add=True)
+    popularity = models.FloatField("Популярность", default=0, editable=False)
+    trending_score = models.FloatField(
+        "Популярность за неделю", default=0, editable=False
+    )
+    deleted_at = models.DateTimeField(
+        "Помечен на удаление", null=True, blank=True, editable=False
+    )
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ("-pub_date",)
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(fields=["-pub_date"], name="recipe_pub_date_idx"),
+            models.Index(
+                fields=["author", "-pub_date"],
+                name="recipe_author_pub_date_idx",
+            ),
+            models.Index(
+                fields=["-popularity", "-pub_date"],
+                name="recipe_popularity_idx",
+            ),
+            models.Index(
+                fields=["-trending_score", "-pub_date"],
+                name="recipe_trending_idx",
+            ),
+            models.Index(
+                fields=["cooking_time", "-pub_date"],
+                name="recipe_cooking_time_idx",
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(deleted_at__isnull=False),
+                name="recipe_deleted_at_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -144,6 +239,12 @@ class RecipeIngredient(models.Model):
                 name="unique_recipe_ingredient",
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["ingredient", "recipe"],
+                name="recipe_ingredient_lookup_idx",
+            ),
+        ]
         ordering = ["ingredient__name"]
 
 
@@ -159,6 +260,7 @@ class RecipeAssociation(models.Model):
         verbose_name="Рецепт",
         related_name="%(class)s_set",
     )
+    created = models.DateTimeField("Добавлено", auto_now_add=True)
 
     class Meta:
         abstract = True
@@ -180,3 +282,45 @@ class ShoppingCart(RecipeAssociation):
     class Meta(RecipeAssociation.Meta):
         verbose_name = "Рецепт в корзине"
         verbose_name_plural = "Рецепты в корзине"
+
+
+class RecipeActivity(models.Model):
+    """Почасовые счётчики добавлений рецепта в избранное и корзину."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="activity",
+        verbose_name="Рецепт",
+    )
+    hour = models.DateTimeField("Час")
+    favorites = models.IntegerField("В избранном", default=0)
+    shopping_carts = models.IntegerField("В корзине", default=0)
+
+    class Meta:
+        verbose_name = "Активность по рецепту"
+        verbose_name_plural = "Активность по рецептам"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "hour"], name="unique_recipe_activity_hour"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["hour"], name="recipe_activity_hour_idx"),
+        ]
+
+
+class ImportProgress(models.Model):
+    """Сколько записей файла уже загрузил import_recipes. Обновляется в
+    транзакции куска, поэтому после сбоя кусок не загрузится повторно."""
+
+    source = models.CharField("Файл", max_length=1024, unique=True)
+    done = models.PositiveBigIntegerField("Загружено записей", default=0)
+    updated = models.DateTimeField("Обновлено", auto_now=True)
+
+    class Meta:
+        verbose_name = "Прогресс импорта"
+        verbose_name_plural = "Прогресс импорта"
+
+    def __str__(self):
+        return f"{self.source}: {self.done}"
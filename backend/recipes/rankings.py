@@ -0,0 +1,132 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Favorite, Recipe, RecipeActivity, ShoppingCart
+
+# Добавление в корзину весит вдвое меньше добавления в избранное.
+WEIGHTS = {"favorites": 1.0, "shopping_carts": 0.5}
+COUNTERS = {Favorite: "favorites", ShoppingCart: "shopping_carts"}
+
+# Окно и период полураспада оценок: (поле Recipe, окно, полураспад).
+SCORES = (
+    ("popularity", timedelta(days=365), timedelta(days=30)),
+    ("trending_score", timedelta(days=7), timedelta(days=1)),
+)
+
+
+def truncate_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _change_activity(recipe_id, hour, counter, delta, create=True):
+    activity = RecipeActivity.objects.filter(recipe_id=recipe_id, hour=hour)
+    if activity.update(**{counter: F(counter) + delta}) or not create:
+        return
+    try:
+        with transaction.atomic():
+            RecipeActivity.objects.create(
+                recipe_id=recipe_id, hour=hour, **{counter: delta}
+            )
+    except IntegrityError:
+        activity.update(**{counter: F(counter) + delta})
+
+
+def association_saved(sender, instance, created, **kwargs):
+    if created:
+        _change_activity(
+            instance.recipe_id,
+            truncate_hour(instance.created),
+            COUNTERS[sender],
+            1,
+        )
+
+
+def association_deleted(sender, instance, **kwargs):
+    # Вычитаем из часа добавления: счётчики всегда равны числу ещё
+    # существующих записей. Строку не создаём — при каскадном удалении
+    # рецепта её уже могли удалить.
+    _change_activity(
+        instance.recipe_id,
+        truncate_hour(instance.created),
+        COUNTERS[sender],
+        -1,
+        create=False,
+    )
+
+
+def rebuild_activity(batch_size=1000):
+    """Пересчёт почасовых счётчиков по полям created (после bulk-операций,
+    которые не отправляют сигналы)."""
+    activity = defaultdict(Counter)
+    for model, counter in COUNTERS.items():
+        for recipe_id, hour, total in (
+            model.objects.annotate(
+                hour=TruncHour("created", tzinfo=dt_timezone.utc)
+            )
+            .values("recipe_id", "hour")
+            .annotate(total=Count("pk"))
+            .values_list("recipe_id", "hour", "total")
+            .iterator()
+        ):
+            activity[recipe_id, hour][counter] += total
+    with transaction.atomic():
+        RecipeActivity.objects.all().delete()
+        RecipeActivity.objects.bulk_create(
+            (
+                RecipeActivity(recipe_id=recipe_id, hour=hour, **counters)
+                for (recipe_id, hour), counters in activity.items()
+            ),
+            batch_size=batch_size,
+        )
+    return len(activity)
+
+
+def _decayed_scores(window, half_life, now):
+    scores = defaultdict(float)
+    for recipe_id, hour, *counts in (
+        RecipeActivity.objects.filter(hour__gte=now - window)
+        .values_list("recipe_id", "hour", *WEIGHTS)
+        .iterator()
+    ):
+        weight = 0.5 ** ((now - hour) / half_life)
+        scores[recipe_id] += weight * sum(
+            count * factor for count, factor in zip(counts, WEIGHTS.values())
+        )
+    return scores
+
+
+def update_scores(now=None, batch_size=1000):
+    """Пересчитывает Recipe.popularity и Recipe.trending_score по почасовым
+    счётчикам с экспоненциальным затуханием."""
+    now = now or timezone.now()
+    scores = {
+        field: _decayed_scores(window, half_life, now)
+        for field, window, half_life in SCORES
+    }
+    fields = [field for field, _, _ in SCORES]
+    recipe_ids = set().union(*scores.values())
+    with transaction.atomic():
+        Recipe.objects.filter(
+            Q(popularity__gt=0) | Q(trending_score__gt=0)
+        ).update(**{field: 0 for field in fields})
+        Recipe.objects.bulk_update(
+            [
+                Recipe(
+                    pk=recipe_id,
+                    **{
+                        field: round(scores[field].get(recipe_id, 0), 6)
+                        for field in fields
+                    },
+                )
+                for recipe_id in recipe_ids
+            ],
+            fields,
+            batch_size=batch_size,
+        )
+    return len(recipe_ids)
@@ -0,0 +1,407 @@
+"""Синтетические данные для нагрузочного тестирования (seed_data).
+
+Строки генерируются кусками; каждый кусок детерминирован (seed, вид
+данных, номер куска), поэтому при тех же --seed и --chunk-size данные
+совпадают при любом числе процессов. Пары
+пользователь — рецепт и подписчик — автор уникальны, потому что куски
+делятся по пользователям, а внутри пользователя значения не повторяются.
+"""
+import csv
+import io
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from math import gcd
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image
+
+from .models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Subscription,
+    User,
+)
+
+USER_COLUMNS = (
+    "id",
+    "password",
+    "last_login",
+    "is_superuser",
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "is_staff",
+    "is_active",
+    "date_joined",
+    "avatar",
+    "deleted_at",
+)
+RECIPE_COLUMNS = (
+    "id",
+    "name",
+    "author_id",
+    "text",
+    "image",
+    "cooking_time",
+    "pub_date",
+    "popularity",
+    "trending_score",
+    "deleted_at",
+)
+RECIPE_INGREDIENT_COLUMNS = ("recipe_id", "ingredient_id", "amount")
+ASSOCIATION_COLUMNS = ("user_id", "recipe_id", "created")
+SUBSCRIPTION_COLUMNS = ("subscriber_id", "author_id", "created")
+
+FIRST_NAMES = (
+    "Анна", "Иван", "Мария", "Пётр", "Ольга", "Алексей", "Елена", "Дмитрий",
+)
+LAST_NAMES = (
+    "Иванова", "Смирнов", "Кузнецова", "Попов", "Соколова", "Лебедев",
+)
+DISHES = (
+    "суп", "салат", "пирог", "рагу", "омлет", "плов", "запеканка", "паста",
+    "каша", "котлеты", "блины", "соус",
+)
+ADJECTIVES = (
+    "домашний", "быстрый", "летний", "острый", "сытный", "праздничный",
+    "постный", "бабушкин",
+)
+
+
+@dataclass(frozen=True)
+class SeedPlan:
+    seed: int
+    users: int
+    recipes: int
+    favorites: int
+    shopping_carts: int
+    subscriptions: int
+    first_user_id: int
+    first_recipe_id: int
+    ingredient_ids: tuple
+    ingredients_per_recipe: tuple
+    author_skew: float
+    popularity_skew: float
+    activity_skew: float
+    activity_weight: float
+    days: int
+    now: datetime
+    password: str
+    image: str
+    prefix: str
+
+
+def real_ingredient_ids(csv_path):
+    """id ингредиентов из data/ingredients.csv, уже загруженных в базу."""
+    with open(csv_path, encoding="utf-8") as source:
+        wanted = {(name, unit) for name, unit in csv.reader(source)}
+    return tuple(
+        pk
+        for pk, name, unit in Ingredient.objects.order_by("pk").values_list(
+            "pk", "name", "measurement_unit"
+        )
+        if (name, unit) in wanted
+    )
+
+
+def placeholder_image():
+    buffer = io.BytesIO()
+    Image.new("RGB", (1, 1), (230, 200, 160)).save(buffer, "PNG")
+    return default_storage.save(
+        "recipes/images/seed.png", ContentFile(buffer.getvalue())
+    )
+
+
+def seed_password():
+    return make_password(None)
+
+
+def reserve_ids(model, count):
+    """Первый id из блока count идентификаторов для явной вставки."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                "nextval(pg_get_serial_sequence(%s, 'id')) + %s - 1)",
+                [table, table, count],
+            )
+            return cursor.fetchone()[0] - count + 1
+        cursor.execute(
+            f"SELECT COALESCE(MAX(id), 0) + 1 "
+            f"FROM {connection.ops.quote_name(table)}"
+        )
+        return cursor.fetchone()[0]
+
+
+def power_law_rank(rng, size, skew):
+    """Ранг 0..size-1 с вероятностью ~ 1 / (ранг + 1) ** skew."""
+    uniform = rng.random()
+    if skew == 1:
+        value = size ** uniform
+    else:
+        value = ((size ** (1 - skew) - 1) * uniform + 1) ** (1 / (1 - skew))
+    return min(int(value) - 1, size - 1)
+
+
+def power_law_total(size, skew):
+    return sum((rank + 1) ** -skew for rank in range(size))
+
+
+class Shuffle:
+    """Перестановка рангов: популярные объекты не идут подряд по id."""
+
+    def __init__(self, size, seed):
+        rng = random.Random(seed)
+        self.size = size
+        self.step = rng.randrange(1, size) if size > 1 else 1
+        while gcd(self.step, size) != 1:
+            self.step += 1
+        self.offset = rng.randrange(size)
+
+    def __call__(self, rank):
+        return (rank * self.step + self.offset) % self.size
+
+
+def _distinct(rng, size, skew, wanted, order, exclude=None):
+    """wanted разных объектов по степенному закону. Повтор заменяется
+    равномерным выбором, иначе хвост распределения набирался бы очень
+    долго."""
+    chosen = set()
+    while len(chosen) < wanted:
+        item = order(power_law_rank(rng, size, skew))
+        if item in chosen or item == exclude:
+            item = rng.randrange(size)
+        if item != exclude:
+            chosen.add(item)
+    return chosen
+
+
+def _moment(rng, plan):
+    return plan.now - timedelta(seconds=rng.randrange(plan.days * 86400))
+
+
+def _chunk_rng(plan, kind, chunk):
+    return random.Random(f"{plan.seed}:{kind}:{chunk}")
+
+
+def user_rows(plan, chunk, start, count):
+    rng = _chunk_rng(plan, "users", chunk)
+    for index in range(start, start + count):
+        yield (
+            plan.first_user_id + index,
+            plan.password,
+            None,
+            False,
+            f"{plan.prefix}{index}",
+            rng.choice(FIRST_NAMES),
+            rng.choice(LAST_NAMES),
+            f"{plan.prefix}{index}@example.com",
+            False,
+            True,
+            _moment(rng, plan),
+            None,
+            None,
+        )
+
+
+def recipe_rows(plan, chunk, start, count):
+    rng = _chunk_rng(plan, "recipes", chunk)
+    authors = Shuffle(plan.users, f"{plan.seed}:authors")
+    for index in range(start, start + count):
+        author = authors(power_law_rank(rng, plan.users, plan.author_skew))
+        name = f"{rng.choice(ADJECTIVES).capitalize()} {rng.choice(DISHES)}"
+        yield (
+            plan.first_recipe_id + index,
+            f"{name} №{index}",
+            plan.first_user_id + author,
+            f"{name}: синтетический рецепт для нагрузочного тестирования.",
+            plan.image,
+            rng.randint(5, 180),
+            _moment(rng, plan),
+            0,
+            0,
+            None,
+        )
+
+
+def recipe_ingredient_rows(plan, chunk, start, count):
+    rng = _chunk_rng(plan, "recipe_ingredients", chunk)
+    ingredients = plan.ingredient_ids
+    order = Shuffle(len(ingredients), f"{plan.seed}:ingredients")
+    low, high = plan.ingredients_per_recipe
+    for index in range(start, start + count):
+        wanted = min(rng.randint(low, high), len(ingredients))
+        for position in sorted(
+            _distinct(rng, len(ingredients), 1.0, wanted, order)
+        ):
+            yield (
+                plan.first_recipe_id + index,
+                ingredients[position],
+                rng.randint(1, 500),
+            )
+
+
+def _targets(plan, rng, kind, total, start, count, limit):
+    """Сколько объектов достаётся каждому пользователю куска: доля total
+    по степенному закону активности, но не больше limit."""
+    activity = Shuffle(plan.users, f"{plan.seed}:{kind}:activity")
+    for index in range(start, start + count):
+        share = (activity(index) + 1) ** -plan.activity_skew
+        expected = total * share / plan.activity_weight
+        yield index, min(int(expected + rng.random()), limit)
+
+
+def _association_rows(plan, kind, total, chunk, start, count):
+    rng = _chunk_rng(plan, kind, chunk)
+    popularity = Shuffle(plan.recipes, f"{plan.seed}:popularity")
+    for index, wanted in _targets(
+        plan, rng, kind, total, start, count, plan.recipes // 2
+    ):
+        for recipe in sorted(
+            _distinct(
+                rng, plan.recipes, plan.popularity_skew, wanted, popularity
+            )
+        ):
+            yield (
+                plan.first_user_id + index,
+                plan.first_recipe_id + recipe,
+                _moment(rng, plan),
+            )
+
+
+def favorite_rows(plan, chunk, start, count):
+    return _association_rows(
+        plan, "favorites", plan.favorites, chunk, start, count
+    )
+
+
+def shopping_cart_rows(plan, chunk, start, count):
+    return _association_rows(
+        plan, "shopping_carts", plan.shopping_carts, chunk, start, count
+    )
+
+
+def subscription_rows(plan, chunk, start, count):
+    rng = _chunk_rng(plan, "subscriptions", chunk)
+    authors = Shuffle(plan.users, f"{plan.seed}:authors")
+    for index, wanted in _targets(
+        plan,
+        rng,
+        "subscriptions",
+        plan.subscriptions,
+        start,
+        count,
+        (plan.users - 1) // 2,
+    ):
+        for author in sorted(
+            _distinct(
+                rng,
+                plan.users,
+                plan.popularity_skew,
+                wanted,
+                authors,
+                exclude=index,
+            )
+        ):
+            yield (
+                plan.first_user_id + index,
+                plan.first_user_id + author,
+                _moment(rng, plan),
+            )
+
+
+# Вид данных: модель, столбцы, генератор строк и по какой сущности
+# (пользователям или рецептам) делятся куски. Порядок — порядок загрузки.
+KINDS = {
+    "users": (User, USER_COLUMNS, user_rows, "users"),
+    "recipes": (Recipe, RECIPE_COLUMNS, recipe_rows, "recipes"),
+    "recipe_ingredients": (
+        RecipeIngredient,
+        RECIPE_INGREDIENT_COLUMNS,
+        recipe_ingredient_rows,
+        "recipes",
+    ),
+    "favorites": (Favorite, ASSOCIATION_COLUMNS, favorite_rows, "users"),
+    "shopping_carts": (
+        ShoppingCart,
+        ASSOCIATION_COLUMNS,
+        shopping_cart_rows,
+        "users",
+    ),
+    "subscriptions": (
+        Subscription,
+        SUBSCRIPTION_COLUMNS,
+        subscription_rows,
+        "users",
+    ),
+}
+
+
+def write_rows(model, columns, rows, batch_size):
+    """COPY в PostgreSQL, пакетный INSERT в остальных СУБД."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ", ".join(connection.ops.quote_name(column) for column in columns)
+    written = 0
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            with cursor.cursor.copy(
+                f"COPY {table} ({names}) FROM STDIN"
+            ) as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    written += 1
+            return written
+        sql = (
+            f"INSERT INTO {table} ({names}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})"
+        )
+        adapt = connection.ops.adapt_datetimefield_value
+        batch = []
+        for row in rows:
+            batch.append(
+                tuple(
+                    adapt(value) if isinstance(value, datetime) else value
+                    for value in row
+                )
+            )
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            written += len(batch)
+    return written
+
+
+def seed_chunk(task):
+    """Генерирует и записывает один кусок; вызывается и в процессах пула."""
+    plan, kind, chunk, start, count, batch_size = task
+    model, columns, generate, _ = KINDS[kind]
+    with transaction.atomic():
+        written = write_rows(
+            model, columns, generate(plan, chunk, start, count), batch_size
+        )
+    return kind, written
+
+
+def chunks(plan, kind, chunk_size, batch_size):
+    size = getattr(plan, KINDS[kind][3])
+    for chunk, start in enumerate(range(0, size, chunk_size)):
+        yield (
+            plan,
+            kind,
+            chunk,
+            start,
+            min(chunk_size, size - start),
+            batch_size,
+        )
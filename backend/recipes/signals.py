@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Массовая загрузка ингредиентов (bulk_create не отправляет post_save).
+ingredients_loaded = Signal()
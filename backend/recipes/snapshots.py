@@ -0,0 +1,161 @@
+"""Статические страницы рецептов для коротких ссылок /s/<id>/.
+
+nginx отдаёт SNAPSHOT_ROOT/<id>.html напрямую: краулеры получают
+OpenGraph-разметку без SPA, а браузер сразу переходит на /recipes/<id>.
+Если снимка нет, запрос уходит в redirect_short_link. Снимок
+перезаписывается только при изменении рецепта, его автора или
+ингредиентов и только если HTML действительно изменился.
+"""
+import os
+import tempfile
+from functools import partial
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.template.loader import render_to_string
+
+from .models import Recipe, RecipeIngredient
+
+# Сохранение этих полей не меняет страницу рецепта.
+_IGNORED_USER_FIELDS = frozenset({"last_login", "password"})
+
+
+def snapshot_path(recipe_id):
+    return os.path.join(settings.SNAPSHOT_ROOT, f"{recipe_id}.html")
+
+
+def _recipes():
+    # Чтение с основной базы: снимок строится сразу после записи.
+    return (
+        Recipe.objects.using(DEFAULT_DB_ALIAS)
+        .select_related("author")
+        .prefetch_related("recipe_ingredients__ingredient")
+        .order_by("pk")
+    )
+
+
+def render_snapshot(recipe):
+    return render_to_string(
+        "recipes/snapshot.html",
+        {
+            "recipe": recipe,
+            "site_url": settings.SITE_URL,
+            "ingredients": recipe.recipe_ingredients.all(),
+        },
+    )
+
+
+def write_snapshot(recipe):
+    """Записывает страницу рецепта; False, если она не изменилась."""
+    content = render_snapshot(recipe).encode()
+    path = snapshot_path(recipe.pk)
+    try:
+        with open(path, "rb") as current:
+            if current.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(settings.SNAPSHOT_ROOT, exist_ok=True)
+    # Через временный файл: nginx не должен отдать недописанную страницу.
+    descriptor, temporary = tempfile.mkstemp(
+        dir=settings.SNAPSHOT_ROOT, suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as snapshot:
+            snapshot.write(content)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return True
+
+
+def remove_snapshot(recipe_id):
+    try:
+        os.unlink(snapshot_path(recipe_id))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def refresh(recipe_ids):
+    """Обновляет снимки рецептов; снимки удалённых рецептов стираются."""
+    recipe_ids = set(recipe_ids)
+    for recipe in _recipes().filter(pk__in=recipe_ids):
+        write_snapshot(recipe)
+        recipe_ids.discard(recipe.pk)
+    for recipe_id in recipe_ids:
+        remove_snapshot(recipe_id)
+
+
+def _snapshot_ids():
+    if not os.path.isdir(settings.SNAPSHOT_ROOT):
+        return set()
+    recipe_ids = set()
+    for name in os.listdir(settings.SNAPSHOT_ROOT):
+        stem, extension = os.path.splitext(name)
+        if extension == ".html" and stem.isdigit():
+            recipe_ids.add(int(stem))
+    return recipe_ids
+
+
+def rebuild(chunk_size=500, force=False):
+    """Снимки рецептов, у которых их ещё нет: остальные обновляются
+    сигналами. force перерисовывает все, например после смены шаблона
+    или SITE_URL. Возвращает число записанных, неизменных и удалённых
+    (рецепт удалён) страниц."""
+    snapshot_ids = _snapshot_ids()
+    recipe_ids = set(
+        Recipe.objects.using(DEFAULT_DB_ALIAS).values_list("pk", flat=True)
+    )
+    pending = sorted(recipe_ids if force else recipe_ids - snapshot_ids)
+    written = 0
+    for start in range(0, len(pending), chunk_size):
+        for recipe in _recipes().filter(
+            pk__in=pending[start:start + chunk_size]
+        ):
+            written += write_snapshot(recipe)
+    removed = sum(
+        remove_snapshot(recipe_id) for recipe_id in snapshot_ids - recipe_ids
+    )
+    return written, len(recipe_ids) - written, removed
+
+
+def schedule(recipe_ids):
+    """Обновит снимки после фиксации транзакции. Ошибка записи файла
+    попадает в лог и не ломает уже выполненный запрос."""
+    if settings.SNAPSHOTS_ENABLED and recipe_ids:
+        transaction.on_commit(partial(refresh, list(recipe_ids)), robust=True)
+
+
+def recipe_changed(sender, instance, **kwargs):
+    schedule([instance.pk])
+
+
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    if not settings.SNAPSHOTS_ENABLED or (
+        update_fields and _IGNORED_USER_FIELDS.issuperset(update_fields)
+    ):
+        return
+    schedule(
+        list(
+            Recipe.objects.filter(author_id=instance.pk).values_list(
+                "pk", flat=True
+            )
+        )
+    )
+
+
+def ingredient_changed(sender, instance, created=False, **kwargs):
+    """post_save и pre_delete ингредиента: до удаления, пока связи
+    с рецептами ещё не стёрты каскадом."""
+    if not settings.SNAPSHOTS_ENABLED or created:
+        return
+    schedule(
+        list(
+            RecipeIngredient.objects.filter(
+                ingredient_id=instance.pk
+            ).values_list("recipe_id", flat=True)
+        )
+    )
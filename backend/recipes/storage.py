@@ -0,0 +1,100 @@
+import hashlib
+import posixpath
+import re
+from functools import partial
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+HASHED_NAME_RE = re.compile(r"(^|/)[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$")
+# Первый ключ pg_advisory_xact_lock(int, int) для блокировок имён файлов.
+MEDIA_LOCK_NAMESPACE = 4_172_032
+
+
+def lock_name(name):
+    """Блокирует имя файла до конца текущей транзакции (PostgreSQL).
+
+    save() отдаёт имя уже существующего файла, а запись, которая на него
+    сошлётся, ещё не зафиксирована. Пока блокировка держится, сборка
+    мусора (delete_if_unreferenced) ждёт и затем видит новую ссылку.
+    SQLite пишет строго по очереди и обходится без блокировки.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != "postgresql" or not connection.in_atomic_block:
+        return
+    key = int.from_bytes(
+        hashlib.sha256(name.encode()).digest()[:4], "big", signed=True
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s, %s)",
+            [MEDIA_LOCK_NAMESPACE, key],
+        )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под именем <каталог>/ab/cd/<sha256><расширение>.
+
+    Одинаковые загрузки не дублируются, а файл по заданному имени никогда
+    не меняется, поэтому его можно отдавать с immutable-кэшированием.
+    """
+
+    def __init__(self, **kwargs):
+        # Одновременная запись одного содержимого перезаписывает
+        # идентичный файл вместо выбора нового имени.
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+
+    def get_hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        return posixpath.join(
+            posixpath.dirname(name),
+            digest[:2],
+            digest[2:4],
+            digest + posixpath.splitext(name)[1].lower(),
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.get_hashed_name(name, content)
+        lock_name(name)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+def is_referenced(name):
+    from .models import Recipe, User
+
+    # Только основная база: реплика может ещё не видеть новую ссылку.
+    return (
+        Recipe.all_objects.using(DEFAULT_DB_ALIAS).filter(image=name).exists()
+        or User.all_objects.using(DEFAULT_DB_ALIAS)
+        .filter(avatar=name)
+        .exists()
+    )
+
+
+def _collect(storage, name):
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        lock_name(name)
+        if not is_referenced(name):
+            storage.delete(name)
+
+
+def delete_if_unreferenced(storage, name):
+    """Удаляет файл, если на него больше не ссылается ни одна запись.
+
+    Проверка выполняется после фиксации текущей транзакции, под
+    блокировкой имени: так транзакция никогда не держит две блокировки
+    имён сразу и не может взаимно заблокироваться с другой загрузкой.
+    """
+    if name:
+        transaction.on_commit(partial(_collect, storage, name))
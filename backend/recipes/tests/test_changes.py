@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.transaction import TransactionManagementError
+from django.test import TransactionTestCase
+from recipes.changes import last_change_seq, next_change_seqs
+from recipes.models import Ingredient, IngredientTombstone
+
+
+class ChangeSeqTests(TransactionTestCase):
+    """Без обёртки TestCase: сохранения идут в autocommit."""
+
+    def test_requires_transaction(self):
+        with self.assertRaises(TransactionManagementError):
+            next_change_seqs()
+        with transaction.atomic():
+            self.assertEqual(next_change_seqs(3), [1, 2, 3])
+
+    def test_save_and_delete_outside_transaction(self):
+        salt = Ingredient.objects.create(name="соль", measurement_unit="г")
+        flour = Ingredient.objects.create(name="мука", measurement_unit="г")
+        self.assertEqual((salt.change_seq, flour.change_seq), (1, 2))
+        salt.name = "соль морская"
+        salt.save()
+        self.assertEqual(salt.change_seq, 3)
+        flour_id = flour.pk
+        flour.delete()
+        self.assertEqual(
+            IngredientTombstone.objects.get(ingredient_id=flour_id).change_seq,
+            4,
+        )
+        self.assertEqual(last_change_seq(), 4)
@@ -0,0 +1,69 @@
+import csv
+import tempfile
+from io import StringIO
+from itertools import islice
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from recipes import seeding
+from recipes.models import Ingredient, Recipe, User
+
+
+class SeedDataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        path = settings.BASE_DIR.parent / "data" / "ingredients.csv"
+        with open(path, encoding="utf-8") as file:
+            Ingredient.objects.bulk_create(
+                Ingredient(name=name, measurement_unit=unit)
+                for name, unit in islice(csv.reader(file), 20)
+            )
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def seed(self, **options):
+        call_command(
+            "seed_data",
+            users=5,
+            recipes=10,
+            favorites=10,
+            shopping_carts=5,
+            subscriptions=5,
+            skip_rankings=True,
+            stdout=StringIO(),
+            stderr=StringIO(),
+            **options,
+        )
+
+    def test_seed(self):
+        self.seed(seed=3)
+        self.assertEqual(
+            User.objects.filter(username__startswith="seed3-").count(), 5
+        )
+        self.assertEqual(Recipe.objects.count(), 10)
+
+    def test_same_seed_rejected(self):
+        self.seed(seed=3)
+        users, recipes = User.objects.count(), Recipe.objects.count()
+        with mock.patch.object(
+            seeding, "reserve_ids"
+        ) as reserve_ids, mock.patch.object(
+            seeding, "placeholder_image"
+        ) as placeholder_image:
+            with self.assertRaisesMessage(CommandError, "seed3-"):
+                self.seed(seed=3)
+        reserve_ids.assert_not_called()
+        placeholder_image.assert_not_called()
+        self.assertEqual(User.objects.count(), users)
+        self.assertEqual(Recipe.objects.count(), recipes)
+
+        self.seed(seed=4)
+        self.assertEqual(User.objects.count(), users + 5)
@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from recipes import snapshots
+from recipes.models import Ingredient, Recipe, RecipeIngredient, User
+
+
+class SnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email="author@example.com",
+            username="author",
+            first_name="Анна",
+            last_name="Петрова",
+            password="password",
+        )
+        cls.salt = Ingredient.objects.create(name="соль", measurement_unit="г")
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author,
+                name=f"Рецепт {index}",
+                text="Описание",
+                image="recipes/images/recipe.png",
+                cooking_time=10,
+            )
+            for index in range(3)
+        ]
+        RecipeIngredient.objects.create(
+            recipe=cls.recipes[0], ingredient=cls.salt, amount=5
+        )
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(
+            SNAPSHOT_ROOT=self.root,
+            SNAPSHOTS_ENABLED=True,
+            SITE_URL="https://foodgram.example",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.recipe = self.recipes[0]
+
+    def read(self, recipe_id):
+        with open(snapshots.snapshot_path(recipe_id), encoding="utf-8") as f:
+            return f.read()
+
+    def exists(self, recipe_id):
+        return os.path.exists(snapshots.snapshot_path(recipe_id))
+
+    def refresh_on_commit(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            action()
+
+    def test_write_snapshot(self):
+        self.assertTrue(snapshots.write_snapshot(self.recipe))
+        page = self.read(self.recipe.pk)
+        self.assertIn("<title>Рецепт 0 — Фудграм</title>", page)
+        self.assertIn("соль — 5 г", page)
+        self.assertIn("Анна Петрова", page)
+        self.assertIn(
+            f'content="https://foodgram.example/s/{self.recipe.pk}/"', page
+        )
+        self.assertFalse(snapshots.write_snapshot(self.recipe))
+        self.assertEqual(
+            [name for name in os.listdir(self.root)],
+            [f"{self.recipe.pk}.html"],
+        )
+
+    def test_refresh(self):
+        deleted_id = max(recipe.pk for recipe in self.recipes) + 1
+        open(snapshots.snapshot_path(deleted_id), "w").close()
+        snapshots.refresh([self.recipe.pk, deleted_id])
+        self.assertTrue(self.exists(self.recipe.pk))
+        self.assertFalse(self.exists(deleted_id))
+
+    def test_rebuild(self):
+        self.assertEqual(snapshots.rebuild(), (3, 0, 0))
+        self.assertEqual(snapshots.rebuild(), (0, 3, 0))
+
+        os.unlink(snapshots.snapshot_path(self.recipes[1].pk))
+        stale_id = max(recipe.pk for recipe in self.recipes) + 1
+        open(snapshots.snapshot_path(stale_id), "w").close()
+        self.assertEqual(snapshots.rebuild(chunk_size=1), (1, 2, 1))
+        self.assertFalse(self.exists(stale_id))
+
+        with override_settings(SITE_URL="https://other.example"):
+            self.assertEqual(snapshots.rebuild(), (0, 3, 0))
+            self.assertEqual(snapshots.rebuild(force=True), (3, 0, 0))
+        self.assertIn("https://other.example", self.read(self.recipe.pk))
+
+    def test_recipe_saved_and_deleted(self):
+        self.recipe.name = "Новое название"
+        self.refresh_on_commit(self.recipe.save)
+        self.assertIn("Новое название", self.read(self.recipe.pk))
+        recipe_id = self.recipe.pk
+        self.refresh_on_commit(self.recipe.delete)
+        self.assertFalse(self.exists(recipe_id))
+
+    def test_author_changed(self):
+        snapshots.rebuild()
+        self.author.first_name = "Мария"
+        self.refresh_on_commit(self.author.save)
+        self.assertIn("Мария Петрова", self.read(self.recipe.pk))
+
+    def test_author_login_ignored(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.author.save(update_fields=["last_login"])
+        self.assertEqual(callbacks, [])
+
+    def test_ingredient_changed(self):
+        snapshots.rebuild()
+        self.salt.name = "соль морская"
+        self.refresh_on_commit(self.salt.save)
+        self.assertIn("соль морская — 5 г", self.read(self.recipe.pk))
+
+    def test_ingredient_deleted(self):
+        snapshots.rebuild()
+        self.refresh_on_commit(self.salt.delete)
+        self.assertNotIn("соль", self.read(self.recipe.pk))
+
+    def test_new_ingredient_ignored(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Ingredient.objects.create(name="перец", measurement_unit="г")
+        self.assertFalse(
+            any(
+                getattr(callback, "func", None) is snapshots.refresh
+                for callback in callbacks
+            )
+        )